@@ -0,0 +1,31 @@
+"""Add SAN move history to bot games
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # SAN movetext kept next to the UCI moves for PGN export.
+    # Existing games keep an empty value and fall back to replaying moves.
+    op.add_column(
+        "bot_games",
+        sa.Column("san_moves", sa.Text(), server_default="", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("bot_games", "san_moves")
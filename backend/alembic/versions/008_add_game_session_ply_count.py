@@ -0,0 +1,41 @@
+"""Add ply counter to game sessions
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Plies played, so the move count doesn't need the game_moves rows
+    op.add_column(
+        "game_sessions",
+        sa.Column("ply_count", sa.Integer(), server_default="0", nullable=False),
+    )
+
+    # Backfill from the moves already recorded
+    op.execute(
+        """
+        UPDATE game_sessions
+        SET ply_count = (
+            SELECT COUNT(*) FROM game_moves
+            WHERE game_moves.game_id = game_sessions.id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("game_sessions", "ply_count")
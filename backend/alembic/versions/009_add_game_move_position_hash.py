@@ -0,0 +1,37 @@
+"""Add position hashes to game moves
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Zobrist hash of the position after each move, for repetition draws.
+    # Existing moves keep NULL and are hashed by replay when a game is loaded.
+    op.add_column(
+        "game_moves",
+        sa.Column("position_hash", sa.BigInteger(), nullable=True),
+    )
+    op.create_index(
+        "ix_game_moves_game_id_position_hash",
+        "game_moves",
+        ["game_id", "position_hash"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_game_moves_game_id_position_hash", table_name="game_moves")
+    op.drop_column("game_moves", "position_hash")
@@ -0,0 +1,36 @@
+"""Add millisecond clocks to game sessions
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Clocks are kept by the server in milliseconds; the seconds columns
+    # stay for the API. Existing games keep NULL and use the seconds.
+    op.add_column(
+        "game_sessions",
+        sa.Column("white_time_ms", sa.Integer(), nullable=True),
+    )
+    op.add_column(
+        "game_sessions",
+        sa.Column("black_time_ms", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("game_sessions", "black_time_ms")
+    op.drop_column("game_sessions", "white_time_ms")
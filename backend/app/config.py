@@ -6,6 +6,15 @@ class Settings(BaseSettings):
     environment: str = "development"
     debug: bool = True
 
+    # Database connection pool, per engine (sync and async each have one)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10  # extra connections allowed above the pool size
+    db_pool_timeout: float = 30.0  # seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # seconds before a connection is replaced (-1 = never)
+    db_pool_pre_ping: bool = True  # check connections before use
+    db_statement_timeout_ms: int = 0  # PostgreSQL statement_timeout (0 = none)
+    sql_echo: bool = False  # log every SQL statement
+
     # Frontend URL for CORS
     frontend_url: str = "http://localhost:3000"
 
@@ -16,6 +25,48 @@ class Settings(BaseSettings):
 
     # Stockfish
     stockfish_path: str = "/usr/bin/stockfish"
+    stockfish_pool_size: int = 0  # engines across the sync and async pools, 0 = one per CPU core
+    stockfish_pool_max_waiters: int = 64  # searches allowed to queue for a free engine
+    stockfish_pool_timeout: float = 10.0  # seconds to wait for a free engine
+
+    # Bot best-move cache (0 entries = disabled)
+    bot_move_cache_size: int = 50000
+    bot_move_cache_ttl: float = 86400.0  # seconds
+
+    # Polyglot opening book for the bot's first plies (empty = disabled)
+    opening_book_path: str = ""
+
+    # Local Syzygy tablebases for endgames (empty = disabled)
+    syzygy_path: str = ""
+    syzygy_cache_size: int = 100000  # cached probe results
+
+    # Live multiplayer games: moves are kept in memory and written behind
+    live_game_flush_interval: float = 1.0  # seconds between database flushes
+    live_game_idle_timeout: float = 600.0  # seconds before an idle game is unloaded
+
+    # Event bus for achievements: "queued" (handled in the background, in
+    # batches) or "sync" (handled inside the request, e.g. for tests)
+    event_bus_mode: str = "queued"
+    event_bus_interval: float = 0.5  # seconds between queue drains
+    event_bus_batch_size: int = 500  # events handled per transaction
+    event_bus_max_attempts: int = 5  # tries per failed batch before it's dead-lettered
+    event_bus_retry_backoff: float = 1.0  # seconds before the first retry, doubled after each
+
+    # Achievement catalog cached in memory
+    achievement_catalog_check_interval: float = 60.0  # seconds between version checks
+    achievement_unlocked_cache_size: int = 100000  # users whose unlocked bitset is cached
+
+    # Server-side game clocks
+    clock_tick_ms: int = 100  # timer wheel resolution for flagging timeouts
+    clock_wheel_slots: int = 1024
+
+    # Redis for WebSocket broadcasts across workers (empty = single process)
+    redis_url: str = ""
+
+    # WebSocket outbound queues
+    ws_queue_size: int = 64  # messages queued per connection
+    ws_queue_policy: str = "close"  # when full: "close" the connection or "drop" the oldest
+    ws_send_timeout: float = 5.0  # seconds before a stuck send evicts the connection
 
     class Config:
         env_file = ".env"
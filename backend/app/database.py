@@ -1,11 +1,78 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from app.config import settings
 
-engine = create_engine(settings.database_url, echo=settings.debug)
+# Async drivers for the databases we run on
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """The same database URL with its async driver (e.g. postgresql+asyncpg)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+
+    parsed = parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}")
+    if driver == "asyncpg" and "sslmode" in parsed.query:
+        # asyncpg takes the libpq sslmode values as "ssl"
+        parsed = parsed.update_query_dict(
+            {"ssl": parsed.query["sslmode"]}
+        ).difference_update_query(["sslmode"])
+    return parsed.render_as_string(hide_password=False)
+
+
+def engine_options(url: str) -> dict:
+    """
+    Pool and connection options for an engine, from the settings.
+
+    SQLite keeps SQLAlchemy's default pool (tests and local runs).
+    """
+    options = {"echo": settings.sql_echo}
+
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+
+    if settings.db_statement_timeout_ms and parsed.get_backend_name() == "postgresql":
+        timeout = str(settings.db_statement_timeout_ms)
+        if parsed.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+
+    return options
+
+
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for code running on the event loop (WebSocket handlers),
+# where a blocking query would stall every connection of the worker
+ASYNC_DATABASE_URL = async_database_url(settings.database_url)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    # Attributes stay readable after commit without another query
+    expire_on_commit=False,
+)
+
 
 class Base(DeclarativeBase):
     pass
@@ -17,3 +84,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _pool_stats(pool) -> dict:
+    stats = {"pool": type(pool).__name__}
+    # Only queue pools keep counters; SQLite's pools don't
+    if hasattr(pool, "checkedout"):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(0, pool.overflow()),
+        )
+    return stats
+
+
+def pool_stats() -> dict:
+    """Connection pool usage of both engines."""
+    return {
+        "sync": _pool_stats(engine.pool),
+        "async": _pool_stats(async_engine.pool),
+    }
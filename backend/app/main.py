@@ -1,15 +1,74 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
+from app.database import pool_stats
 from app.routers import puzzles, users, games, bot_games, auth, lessons, achievements
 # Import services to ensure event handlers are registered
 from app import services  # noqa: F401
+from app.services import (
+    get_stockfish_service,
+    get_async_stockfish_service,
+    connection_manager,
+    live_games,
+    timer_wheel,
+    event_bus,
+)
+from app.services.opening_book import get_opening_book
+from app.services.tablebase import get_tablebase
+
+
+async def flush_live_games():
+    """Periodically write in-memory game state to the database."""
+    while True:
+        await asyncio.sleep(settings.live_game_flush_interval)
+        await asyncio.to_thread(live_games.flush_all)
+        # Rooms followed for games that have left memory
+        await connection_manager.unfollow_except(live_games.codes())
+
+
+async def process_events():
+    """Periodically handle queued achievement events."""
+    while True:
+        await asyncio.sleep(settings.event_bus_interval)
+        if len(event_bus):
+            await asyncio.to_thread(event_bus.drain)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    flusher = asyncio.create_task(flush_live_games())
+    event_worker = asyncio.create_task(process_events())
+    # One task flags every game clock that runs out
+    timer_wheel.start(games.flag_game)
+    yield
+    await timer_wheel.stop()
+    flusher.cancel()
+    with suppress(asyncio.CancelledError):
+        await flusher
+    # Persist moves still held in memory
+    live_games.flush_all()
+    event_worker.cancel()
+    with suppress(asyncio.CancelledError):
+        await event_worker
+    # Handle events still in the queue, retrying failed batches once more
+    event_bus.drain(retry_all=True)
+    await connection_manager.close()
+    # Stop engine processes on shutdown
+    get_stockfish_service().close()
+    await get_async_stockfish_service().close()
+    get_opening_book().close()
+    get_tablebase().close()
+
 
 app = FastAPI(
     title="Chessly API",
     description="Chess puzzle training and multiplayer chess application",
     version="0.7.0",
+    lifespan=lifespan,
 )
 
 # Build CORS origins list
@@ -41,3 +100,9 @@ app.include_router(achievements.router, prefix="/achievements", tags=["achieveme
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/health/db")
+def database_pool_stats():
+    """Database connection pool usage for this worker."""
+    return pool_stats()
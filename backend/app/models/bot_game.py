@@ -41,6 +41,9 @@ class BotGame(Base):
     # Move history (space-separated UCI moves)
     moves: Mapped[str] = mapped_column(Text, default="")
 
+    # Same moves in SAN, kept in step with moves so PGN export needs no replay
+    san_moves: Mapped[str] = mapped_column(Text, default="")
+
     # PGN
     pgn: Mapped[str | None] = mapped_column(Text, nullable=True)
 
@@ -76,9 +79,14 @@ class BotGame(Base):
         else:
             return current_turn == "b"
 
-    def add_move(self, move: str):
-        """Add a move to the history."""
+    def add_move(self, move: str, san: str):
+        """Add a move (UCI and SAN) to the history."""
         if self.moves:
             self.moves = f"{self.moves} {move}"
         else:
             self.moves = move
+
+        if self.san_moves:
+            self.san_moves = f"{self.san_moves} {san}"
+        else:
+            self.san_moves = san
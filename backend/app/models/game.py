@@ -5,7 +5,7 @@ from enum import Enum
 from typing import TYPE_CHECKING
 import secrets
 
-from sqlalchemy import String, Text, DateTime, Integer, ForeignKey, func
+from sqlalchemy import String, Text, DateTime, Integer, BigInteger, ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -82,6 +82,8 @@ class GameSession(Base):
         String(100),
         default="rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
     )
+    # Plies played, kept in step with game_moves so reads don't load them
+    ply_count: Mapped[int] = mapped_column(Integer, default=0)
 
     # Time control
     time_control: Mapped[str] = mapped_column(
@@ -89,6 +91,9 @@ class GameSession(Base):
     )
     white_time_remaining: Mapped[int] = mapped_column(Integer, default=300)  # seconds
     black_time_remaining: Mapped[int] = mapped_column(Integer, default=300)
+    # Server clocks in milliseconds; NULL until written by a live game
+    white_time_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    black_time_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
@@ -111,8 +116,15 @@ class GameSession(Base):
     black_player: Mapped["User | None"] = relationship(
         "User", foreign_keys=[black_player_id]
     )
+    # Not loaded unless asked for (selectinload); game_moves rows are
+    # removed by the database's ON DELETE CASCADE
     moves: Mapped[list["GameMove"]] = relationship(
-        "GameMove", back_populates="game", cascade="all, delete-orphan"
+        "GameMove",
+        back_populates="game",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise_on_sql",
+        order_by="GameMove.move_number",
     )
 
     @property
@@ -123,11 +135,14 @@ class GameSession(Base):
     @property
     def move_count(self) -> int:
         """Get the number of moves played."""
-        return len(self.moves)
+        return self.ply_count
 
 
 class GameMove(Base):
     __tablename__ = "game_moves"
+    __table_args__ = (
+        Index("ix_game_moves_game_id_position_hash", "game_id", "position_hash"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     game_id: Mapped[int] = mapped_column(
@@ -138,6 +153,8 @@ class GameMove(Base):
     move_san: Mapped[str] = mapped_column(String(10))  # e.g., "e4"
     fen_after: Mapped[str] = mapped_column(String(100))
     time_spent: Mapped[int] = mapped_column(Integer, default=0)  # milliseconds
+    # Zobrist hash of the position after the move (signed 64-bit)
+    position_hash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
@@ -44,45 +44,24 @@ def get_user_achievements(
     db: Session = Depends(get_db)
 ):
     """Pobiera achievementy użytkownika (odblokowane i zablokowane)"""
-    user = get_user_by_discord_id(db, discord_id)
-
-    all_achievements = AchievementService.get_all_achievements(db)
-    user_achievements = AchievementService.get_user_achievements(db, user.id)
-
-    unlocked_ids = {ua.achievement_id for ua in user_achievements}
-
-    unlocked = []
-    locked = []
-
-    for ua in user_achievements:
-        unlocked.append(UserAchievementResponse(
-            achievement=AchievementResponse(
-                id=ua.achievement.id,
-                code=ua.achievement.code,
-                name=ua.achievement.name,
-                description=ua.achievement.description,
-                icon=ua.achievement.icon,
-                threshold=ua.achievement.threshold
-            ),
-            unlocked_at=ua.unlocked_at
-        ))
+    # Jedno zapytanie (LEFT JOIN) + katalog achievementów z pamięci
+    view = AchievementService.get_user_achievements_view(db, discord_id)
+    if view is None:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    for a in all_achievements:
-        if a.id not in unlocked_ids:
-            locked.append(AchievementResponse(
-                id=a.id,
-                code=a.code,
-                name=a.name,
-                description=a.description,
-                icon=a.icon,
-                threshold=a.threshold
-            ))
+    unlocked, locked = view
 
     return UserAchievementsListResponse(
-        unlocked=unlocked,
-        locked=locked,
+        unlocked=[
+            UserAchievementResponse(
+                achievement=AchievementResponse.model_validate(a),
+                unlocked_at=unlocked_at
+            )
+            for a, unlocked_at in unlocked
+        ],
+        locked=[AchievementResponse.model_validate(a) for a in locked],
         total_unlocked=len(unlocked),
-        total_available=len(all_achievements)
+        total_available=len(unlocked) + len(locked)
     )
 
 
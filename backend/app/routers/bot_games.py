@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import PlainTextResponse
+from typing import Callable, Iterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_async_db, SessionLocal
 from app.schemas import (
     BotGameCreate,
     BotGameResponse,
@@ -10,9 +13,17 @@ from app.schemas import (
     BotMoveResponse,
 )
 from app.services.user_service import UserService
-from app.services.bot_game_service import BotGameService
+from app.services.game_service import AsyncGameService
+from app.services.bot_game_service import BotGameService, AsyncBotGameService
 from app.enums import BotDifficulty
-from app.services.stockfish_service import DIFFICULTY_SETTINGS
+from app.services.stockfish_service import (
+    DIFFICULTY_SETTINGS,
+    get_stockfish_service,
+    get_async_stockfish_service,
+)
+from app.services.move_cache import get_move_cache
+from app.services.opening_book import get_opening_book
+from app.services.tablebase import get_tablebase
 
 router = APIRouter()
 
@@ -29,23 +40,60 @@ def get_difficulties():
     }
 
 
+@router.get("/engine/stats")
+def get_engine_stats():
+    """Get Stockfish engine pool stats plus cache, book and tablebase hit rates."""
+    return {
+        "sync": get_stockfish_service().stats(),
+        "async": get_async_stockfish_service().stats(),
+        "move_cache": get_move_cache().stats(),
+        "opening_book": get_opening_book().stats(),
+        "tablebase": get_tablebase().stats(),
+    }
+
+
+def _stream_pgn(export: Callable[[BotGameService], Iterator[str]]) -> Iterator[str]:
+    # The streaming body outlives the request's session, so use its own
+    db = SessionLocal()
+    try:
+        yield from export(BotGameService(db))
+    finally:
+        db.close()
+
+
+def _pgn_response(chunks: Iterator[str], filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type="application/x-chess-pgn",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/export/pgn")
+def export_pgn(game_ids: list[int] = Query(...)):
+    """Stream PGN for many games as a single multi-game PGN file."""
+    return _pgn_response(
+        _stream_pgn(lambda service: service.iter_pgn(game_ids)),
+        "bot-games.pgn",
+    )
+
+
 @router.post("", response_model=BotGameResponse)
-def create_bot_game(
+async def create_bot_game(
     game_data: BotGameCreate,
     discord_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create a new game against the bot."""
-    user_service = UserService(db)
-    user = user_service.get_user_by_discord_id(discord_id)
+    user = await AsyncGameService(db).get_user_by_discord_id(discord_id)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    bot_service = BotGameService(db)
+    bot_service = AsyncBotGameService(db)
 
     try:
-        game = bot_service.create_game(user, game_data)
+        game = await bot_service.create_game(user, game_data)
         return BotGameResponse.from_bot_game(game)
     except RuntimeError as e:
         raise HTTPException(
@@ -70,27 +118,31 @@ def get_bot_game(
 
 
 @router.post("/{game_id}/move", response_model=BotMoveResponse)
-def make_move(
+async def make_move(
     game_id: int,
     move_request: BotMoveRequest,
     discord_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Make a move in the bot game."""
-    user_service = UserService(db)
-    user = user_service.get_user_by_discord_id(discord_id)
+    """
+    Make a move in the bot game.
+
+    Async so the engine search is awaited on the event loop instead of
+    holding a threadpool worker for its whole duration.
+    """
+    user = await AsyncGameService(db).get_user_by_discord_id(discord_id)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    bot_service = BotGameService(db)
-    game = bot_service.get_game_by_id(game_id)
+    bot_service = AsyncBotGameService(db)
+    game = await bot_service.get_game_by_id(game_id)
 
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
 
     try:
-        return bot_service.make_move(game, user, move_request)
+        return await bot_service.make_move(game, user, move_request)
     except RuntimeError as e:
         raise HTTPException(
             status_code=503,
@@ -159,3 +211,26 @@ def get_user_history(
     games = bot_service.get_user_games(user, limit)
 
     return [BotGameResponse.from_bot_game(g) for g in games]
+
+
+@router.get("/user/{discord_id}/history/pgn")
+def export_user_history_pgn(
+    discord_id: str,
+    db: Session = Depends(get_db),
+):
+    """
+    Stream the user's full bot game history as one PGN file.
+
+    Games are read through a server-side cursor, so memory use doesn't
+    grow with the size of the archive.
+    """
+    user_service = UserService(db)
+    user = user_service.get_user_by_discord_id(discord_id)
+
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return _pgn_response(
+        _stream_pgn(lambda service: service.iter_user_pgn(user)),
+        f"chessly-bot-games-{discord_id}.pgn",
+    )
@@ -1,18 +1,30 @@
+import asyncio
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import GameStatus
+from app.database import get_db, get_async_db, AsyncSessionLocal
+from app.models import GameSession, GameStatus, User
 from app.schemas import (
     GameCreate,
     GameJoin,
     GameResponse,
     GameMoveRequest,
     GameMoveResponse,
+    GameMoveSchema,
     PlayerInfo,
 )
-from app.services import GameService, UserService, connection_manager
+from app.services import (
+    GameService,
+    AsyncGameService,
+    UserService,
+    LiveGame,
+    connection_manager,
+    live_games,
+    timer_wheel,
+)
+from app.services.connection_manager import SPECTATOR
 
 router = APIRouter()
 
@@ -51,6 +63,157 @@ def get_game_player_info(game, color: str) -> PlayerInfo | None:
     return None
 
 
+def build_game_response(
+    game,
+    include_moves: bool = False,
+    live: LiveGame | None = None,
+) -> GameResponse:
+    """
+    Build the API response for a game.
+
+    The move count comes from the stored ply counter; the move list is only
+    included when asked for, and must then be loaded with the game. For a
+    game held in memory, the board, clocks and status come from ``live``,
+    which may be ahead of the database.
+    """
+    state = live or game
+    return GameResponse(
+        id=game.id,
+        code=game.code,
+        status=GameStatus(state.status),
+        result=state.result,
+        current_fen=state.current_fen,
+        time_control=game.time_control,
+        white_time_remaining=state.white_time_remaining,
+        black_time_remaining=state.black_time_remaining,
+        white_player=get_game_player_info(game, "white"),
+        black_player=get_game_player_info(game, "black"),
+        is_white_turn=state.is_white_turn,
+        move_count=state.ply_count,
+        created_at=game.created_at,
+        started_at=game.started_at,
+        moves=(
+            [GameMoveSchema.model_validate(move) for move in game.moves]
+            if include_moves
+            else None
+        ),
+    )
+
+
+def game_snapshot(game) -> dict:
+    """Spectator snapshot of a game that isn't held in memory."""
+    return {
+        "type": "snapshot",
+        "fen": game.current_fen,
+        "white_time": game.white_time_remaining,
+        "black_time": game.black_time_remaining,
+        "is_white_turn": game.is_white_turn,
+        "moves": [move.move_san for move in game.moves],
+        "ply": game.ply_count,
+        "status": game.status,
+        "result": game.result,
+    }
+
+
+async def end_live_game(live: LiveGame, result, reason: str):
+    """Persist a finished game right away and tell the room."""
+    # Don't wait for the flusher
+    await asyncio.to_thread(live_games.flush, live)
+    await connection_manager.broadcast_to_all(
+        live.code,
+        {
+            "type": "game_over",
+            "result": result.value,
+            "reason": reason,
+        },
+    )
+
+
+async def publish_move(live: LiveGame, move_uci: str, result: GameMoveResponse):
+    """
+    Tell the room about a move played on a live game.
+
+    Used by both the WebSocket and the REST move paths, so players,
+    spectators and live copies on other workers see every move. Ends the
+    game when the move finished it, or when the mover's flag fell before
+    the move arrived. Rejected moves aren't broadcast.
+    """
+    if result.valid:
+        await connection_manager.broadcast_to_all(
+            live.code,
+            {
+                "type": "move",
+                "move_uci": move_uci,
+                "move_san": result.move_san,
+                "fen": result.fen_after,
+                "white_time": live.white_time_remaining,
+                "black_time": live.black_time_remaining,
+                **live.clock_times(),
+                "is_white_turn": live.is_white_turn,
+                "ply": live.ply_count,
+            },
+        )
+
+        if result.game_over:
+            await end_live_game(
+                live,
+                result.result,
+                "checkmate" if "win" in result.result.value else "draw",
+            )
+    elif result.game_over:
+        await end_live_game(live, result.result, "timeout")
+
+
+async def flag_game(code: str):
+    """
+    Timer wheel callback for a game whose flag deadline has passed.
+
+    Ends the game on time if the side to move is really out of time; if
+    a move got in first, the game is rescheduled instead.
+    """
+    live = live_games.get(code)
+    if live is None:
+        return
+
+    result = live.flag()
+    if result is not None:
+        await end_live_game(live, result, "timeout")
+
+
+async def watch_game(websocket: WebSocket, code: str):
+    """
+    Stream a game to a spectator.
+
+    The spectator gets one snapshot, then the same move and game over
+    broadcasts as the players. Active games are served from memory, so
+    spectators of a loaded game cost no database reads, and none of them
+    holds a database connection while watching.
+    """
+    live = live_games.get(code)
+    game = None
+
+    if live is None:
+        async with AsyncSessionLocal() as db:
+            game = await AsyncGameService(db).get_game_by_code(code, include_moves=True)
+            if game:
+                live = await live_games.get_or_load_async(db, game)
+        if not game:
+            await websocket.close(code=4004, reason="Game not found")
+            return
+
+    await connection_manager.connect(websocket, code, None, role=SPECTATOR)
+    await connection_manager.send_personal(
+        websocket, live.snapshot() if live else game_snapshot(game)
+    )
+
+    try:
+        while True:
+            # Spectators only listen
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        await connection_manager.disconnect(websocket)
+
+
 @router.post("", response_model=GameResponse)
 def create_game(
     game_data: GameCreate,
@@ -78,51 +241,34 @@ def create_game(
     game_service = GameService(db)
     game = game_service.create_game(user, game_data, guest_name)
 
-    return GameResponse(
-        id=game.id,
-        code=game.code,
-        status=GameStatus(game.status),
-        current_fen=game.current_fen,
-        time_control=game.time_control,
-        white_time_remaining=game.white_time_remaining,
-        black_time_remaining=game.black_time_remaining,
-        white_player=get_game_player_info(game, "white"),
-        black_player=get_game_player_info(game, "black"),
-        is_white_turn=game.is_white_turn,
-        move_count=game.move_count,
-        created_at=game.created_at,
-        started_at=game.started_at,
-    )
+    return build_game_response(game)
+
+
+@router.get("/connections/stats")
+def connection_stats():
+    """WebSocket connection, outbound queue and clock stats for this worker."""
+    return {**connection_manager.stats(), "clocks": timer_wheel.stats()}
 
 
 @router.get("/{code}", response_model=GameResponse)
 def get_game(
     code: str,
+    include_moves: bool = Query(False),
     db: Session = Depends(get_db),
 ):
-    """Get game details by code."""
+    """Get game details by code. Pass include_moves=true for the move list."""
+    live = live_games.get(code)
+    if live is not None and include_moves:
+        # Write moves still held in memory so the list is complete
+        live_games.flush(live)
+
     game_service = GameService(db)
-    game = game_service.get_game_by_code(code)
+    game = game_service.get_game_by_code(code, include_moves=include_moves)
 
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    return GameResponse(
-        id=game.id,
-        code=game.code,
-        status=GameStatus(game.status),
-        result=game.result,
-        current_fen=game.current_fen,
-        time_control=game.time_control,
-        white_time_remaining=game.white_time_remaining,
-        black_time_remaining=game.black_time_remaining,
-        white_player=get_game_player_info(game, "white"),
-        black_player=get_game_player_info(game, "black"),
-        is_white_turn=game.is_white_turn,
-        move_count=game.move_count,
-        created_at=game.created_at,
-        started_at=game.started_at,
-    )
+    return build_game_response(game, include_moves=include_moves, live=live)
 
 
 @router.post("/{code}/join", response_model=GameResponse)
@@ -159,73 +305,72 @@ def join_game(
     # Refresh to get updated relationships
     db.refresh(game)
 
-    return GameResponse(
-        id=game.id,
-        code=game.code,
-        status=GameStatus(game.status),
-        current_fen=game.current_fen,
-        time_control=game.time_control,
-        white_time_remaining=game.white_time_remaining,
-        black_time_remaining=game.black_time_remaining,
-        white_player=get_game_player_info(game, "white"),
-        black_player=get_game_player_info(game, "black"),
-        is_white_turn=game.is_white_turn,
-        move_count=game.move_count,
-        created_at=game.created_at,
-        started_at=game.started_at,
-    )
+    return build_game_response(game)
 
 
-@router.post("/{code}/move", response_model=GameMoveResponse)
-def make_move(
-    code: str,
-    move_request: GameMoveRequest,
-    discord_id: str,
-    db: Session = Depends(get_db),
-):
-    """Make a move in the game."""
-    user_service = UserService(db)
-    user = user_service.get_user_by_discord_id(discord_id)
-
+async def load_player_and_live_game(
+    db: AsyncSession, code: str, discord_id: str
+) -> tuple[User, GameSession, LiveGame | None]:
+    """User and game for a REST action on a game, raising 404s, plus its live state."""
+    game_service = AsyncGameService(db)
+    user = await game_service.get_user_by_discord_id(discord_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    game_service = GameService(db)
-    game = game_service.get_game_by_code(code)
-
+    game = await game_service.get_game_by_code(code)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    return game_service.make_move(game, user, move_request)
+    live = await live_games.get_or_load_async(db, game)
 
+    if live is not None:
+        # Follow the room, so moves made on other workers reach this copy
+        await connection_manager.follow(code)
+    return user, game, live
 
-@router.post("/{code}/resign")
-def resign_game(
+
+@router.post("/{code}/move", response_model=GameMoveResponse)
+async def make_move(
     code: str,
+    move_request: GameMoveRequest,
     discord_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Resign from the game."""
-    user_service = UserService(db)
-    user = user_service.get_user_by_discord_id(discord_id)
+    """
+    Make a move in the game.
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    The move goes through the live game like a WebSocket move and is
+    broadcast the same way, so connected players and spectators see it.
+    """
+    user, game, live = await load_player_and_live_game(db, code, discord_id)
+    if live is None:
+        return GameMoveResponse(valid=False, message="Game is not active")
 
-    game_service = GameService(db)
-    game = game_service.get_game_by_code(code)
+    result = live.play_move(user.id, move_request.move)
+    await publish_move(live, move_request.move, result)
+    return result
 
-    if not game:
-        raise HTTPException(status_code=404, detail="Game not found")
 
-    if game.status != GameStatus.ACTIVE.value:
+@router.post("/{code}/resign")
+async def resign_game(
+    code: str,
+    discord_id: str,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Resign from the game. The room is told as for a WebSocket resignation."""
+    user, game, live = await load_player_and_live_game(db, code, discord_id)
+    if live is None or live.is_over:
         raise HTTPException(status_code=400, detail="Game is not active")
 
-    color = game_service.get_player_color(game, user)
+    color = AsyncGameService.get_player_color(game, user)
     if not color:
         raise HTTPException(status_code=400, detail="You are not in this game")
 
-    result = game_service.resign_game(game, user)
+    result = live.resign(user.id)
+    if result is None:
+        raise HTTPException(status_code=400, detail="Game is not active")
+
+    await end_live_game(live, result, "resignation")
     return {"result": result.value}
 
 
@@ -236,7 +381,7 @@ async def game_websocket(
     discord_id: Optional[str] = Query(None),
     guest_name: Optional[str] = Query(None),
     player_color: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    spectate: bool = Query(False),
 ):
     """
     WebSocket endpoint for real-time game communication.
@@ -245,22 +390,39 @@ async def game_websocket(
     - discord_id: For logged-in users
     - guest_name: For anonymous users
     - player_color: For anonymous users, their assigned color ("white" or "black")
+    - spectate: Watch the game; also used for connections that aren't players
 
     Message types:
-    - move: {type: "move", move: "e2e4", time_spent: 1000}
+    - move: {type: "move", move: "e2e4"}
     - resign: {type: "resign"}
     - timeout: {type: "timeout", color: "white"|"black"}
+
+    Clocks run on the server: time_spent in move messages is ignored, and
+    timeout claims are checked against the server clock. Games are also
+    flagged without a claim, when the timer wheel reaches the deadline.
+
+    Spectators get {type: "snapshot", fen, white_time, black_time, moves, ply, ...}
+    and then the move and game_over broadcasts.
+
+    The socket holds no database session. Moves are handled by the live
+    game registry and written behind; the few reads here each use their
+    own short async session, so the pool size bounds concurrent queries
+    rather than connected players.
     """
-    user = None
-    if discord_id:
-        user_service = UserService(db)
-        user = user_service.get_user_by_discord_id(discord_id)
-        if not user:
-            await websocket.close(code=4004, reason="User not found")
-            return
+    if spectate:
+        await watch_game(websocket, code)
+        return
 
-    game_service = GameService(db)
-    game = game_service.get_game_by_code(code)
+    user = None
+    async with AsyncSessionLocal() as db:
+        game_service = AsyncGameService(db)
+        if discord_id:
+            user = await game_service.get_user_by_discord_id(discord_id)
+        game = await game_service.get_game_by_code(code)
+
+    if discord_id and not user:
+        await websocket.close(code=4004, reason="User not found")
+        return
 
     if not game:
         await websocket.close(code=4004, reason="Game not found")
@@ -268,7 +430,7 @@ async def game_websocket(
 
     # Determine player color
     if user:
-        color = game_service.get_player_color(game, user)
+        color = AsyncGameService.get_player_color(game, user)
         player_id = user.id
         player_info = get_player_info(user)
     else:
@@ -282,11 +444,29 @@ async def game_websocket(
             is_guest=True,
         )
 
+    async def live_game() -> LiveGame | None:
+        nonlocal game
+        live = live_games.get(code)
+        if live is None:
+            # The game may have become active (opponent joined) since connecting
+            async with AsyncSessionLocal() as db:
+                game = await AsyncGameService(db).get_game_by_code(code) or game
+                live = await live_games.get_or_load_async(db, game)
+        return live
+
+    if not color:
+        # Not a player in this game
+        await watch_game(websocket, code)
+        return
+
     # Connect to the game room
     await connection_manager.connect(websocket, code, player_id)
 
     # Notify others if a new player joined and game should start
     if game.status == GameStatus.ACTIVE.value and color:
+        # Load the game here so this worker follows moves made on others
+        state = await live_game() or game
+
         await connection_manager.broadcast_to_game(
             code,
             {
@@ -297,8 +477,8 @@ async def game_websocket(
             exclude=websocket,
         )
 
-        # If both players are connected, send game start
-        if connection_manager.get_connection_count(code) == 2:
+        # If both players are connected (on any worker), send game start
+        if await connection_manager.get_room_size(code) == 2:
             white_info = get_game_player_info(game, "white")
             black_info = get_game_player_info(game, "black")
             if white_info and black_info:
@@ -308,9 +488,9 @@ async def game_websocket(
                         "type": "game_start",
                         "white_player": white_info.model_dump(),
                         "black_player": black_info.model_dump(),
-                        "fen": game.current_fen,
-                        "white_time": game.white_time_remaining,
-                        "black_time": game.black_time_remaining,
+                        "fen": state.current_fen,
+                        "white_time": state.white_time_remaining,
+                        "black_time": state.black_time_remaining,
                     },
                 )
 
@@ -323,46 +503,24 @@ async def game_websocket(
             msg_type = data.get("type")
 
             if msg_type == "move":
-                # Refresh game state
-                db.refresh(game)
-
-                move_request = GameMoveRequest(
-                    move=data.get("move", ""),
-                    time_spent=data.get("time_spent", 0),
-                )
+                live = await live_game()
+                if live is None:
+                    await connection_manager.send_personal(
+                        websocket,
+                        {"type": "error", "message": "Game is not active"},
+                    )
+                    continue
 
-                result = game_service.make_move(
-                    game,
-                    user,
-                    move_request,
+                # Validated and applied in memory; written to the DB behind
+                result = live.play_move(
+                    user.id if user else None,
+                    data.get("move", ""),
                     is_white_player=is_white_player,
                 )
 
-                if result.valid:
-                    # Broadcast move to all players
-                    db.refresh(game)
-                    await connection_manager.broadcast_to_all(
-                        code,
-                        {
-                            "type": "move",
-                            "move_uci": data.get("move"),
-                            "move_san": result.move_san,
-                            "fen": result.fen_after,
-                            "white_time": game.white_time_remaining,
-                            "black_time": game.black_time_remaining,
-                            "is_white_turn": game.is_white_turn,
-                        },
-                    )
-
-                    if result.game_over:
-                        await connection_manager.broadcast_to_all(
-                            code,
-                            {
-                                "type": "game_over",
-                                "result": result.result.value,
-                                "reason": "checkmate" if "win" in result.result.value else "draw",
-                            },
-                        )
+                if result.valid or result.game_over:
+                    # Broadcast move to all players (or the flag that fell first)
+                    await publish_move(live, data.get("move"), result)
                 else:
                     # Send error only to the player who made invalid move
                     await connection_manager.send_personal(
@@ -371,38 +529,27 @@ async def game_websocket(
                     )
 
             elif msg_type == "resign":
-                db.refresh(game)
-                if game.status == GameStatus.ACTIVE.value:
-                    result = game_service.resign_game(
-                        game,
-                        user,
-                        is_white_resigning=is_white_player,
-                    )
-                    await connection_manager.broadcast_to_all(
-                        code,
-                        {
-                            "type": "game_over",
-                            "result": result.value,
-                            "reason": "resignation",
-                        },
-                    )
+                live = await live_game()
+                result = live.resign(
+                    user.id if user else None,
+                    is_white_resigning=is_white_player,
+                ) if live else None
+                if result is not None:
+                    await end_live_game(live, result, "resignation")
 
             elif msg_type == "timeout":
-                db.refresh(game)
+                live = await live_game()
                 timed_out_color = data.get("color")
-                if game.status == GameStatus.ACTIVE.value and timed_out_color:
-                    result = game_service.timeout_game(game, timed_out_color)
-                    await connection_manager.broadcast_to_all(
-                        code,
-                        {
-                            "type": "game_over",
-                            "result": result.value,
-                            "reason": "timeout",
-                        },
-                    )
+                result = (
+                    live.timeout(timed_out_color)
+                    if live and timed_out_color
+                    else None
+                )
+                if result is not None:
+                    await end_live_game(live, result, "timeout")
 
     except WebSocketDisconnect:
-        connection_manager.disconnect(websocket)
+        await connection_manager.disconnect(websocket)
 
         # Notify other player about disconnection
         await connection_manager.broadcast_to_game(
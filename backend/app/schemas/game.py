@@ -56,13 +56,14 @@ class GameResponse(BaseModel):
     move_count: int
     created_at: datetime
     started_at: datetime | None = None
+    moves: list[GameMoveSchema] | None = None  # Only with include_moves
 
     model_config = {"from_attributes": True}
 
 
 class GameMoveRequest(BaseModel):
     move: str  # UCI format (e.g., "e2e4")
-    time_spent: int = 0  # milliseconds spent on this move
+    time_spent: int = 0  # milliseconds; ignored for live games, which use the server clock
 
 
 class GameMoveResponse(BaseModel):
@@ -1,15 +1,19 @@
 from app.services.puzzle_service import PuzzleService
 from app.services.user_service import UserService
-from app.services.game_service import GameService
+from app.services.game_service import GameService, AsyncGameService
 from app.services.connection_manager import manager as connection_manager
+from app.services.live_games import LiveGame, live_games
+from app.services.clock_service import GameClock, timer_wheel
 from app.enums import BotDifficulty
 from app.services.stockfish_service import (
     StockfishService,
+    AsyncStockfishService,
     get_stockfish_service,
+    get_async_stockfish_service,
     DIFFICULTY_SETTINGS,
 )
-from app.services.bot_game_service import BotGameService
-from app.services.event_service import EventService, EventType, GameEvent
+from app.services.bot_game_service import BotGameService, AsyncBotGameService
+from app.services.event_service import EventService, EventType, GameEvent, event_bus
 from app.services.achievement_service import AchievementService
 from app.services.lesson_service import LessonService
 
@@ -17,13 +21,22 @@ __all__ = [
     "PuzzleService",
     "UserService",
     "GameService",
+    "AsyncGameService",
     "connection_manager",
+    "LiveGame",
+    "live_games",
+    "GameClock",
+    "timer_wheel",
     "StockfishService",
+    "AsyncStockfishService",
     "get_stockfish_service",
+    "get_async_stockfish_service",
     "BotDifficulty",
     "DIFFICULTY_SETTINGS",
     "BotGameService",
+    "AsyncBotGameService",
     "EventService",
+    "event_bus",
     "EventType",
     "GameEvent",
     "AchievementService",
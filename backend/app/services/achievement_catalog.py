@@ -0,0 +1,269 @@
+"""
+Achievement Catalog - katalog achievementów trzymany w pamięci procesu.
+
+Katalog zmienia się tylko przy migracjach, więc nie ma sensu pytać bazy
+o achievementy przy każdym evencie. Katalog jest indeksowany po typie
+eventu i posortowany po progu, więc przekroczone progi znajduje bisect.
+
+Odblokowane achievementy użytkowników trzymane są jako bitsety w cache
+LRU (UnlockedAchievementsCache).
+"""
+
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.achievement import Achievement
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """Niezmienna kopia aktywnego achievementu"""
+    id: int
+    code: str
+    name: str
+    description: str
+    icon: Optional[str]
+    event_type: str
+    threshold: int
+    order_index: int
+
+
+@dataclass(frozen=True)
+class _EventIndex:
+    """Achievementy jednego typu eventu, posortowane po progu"""
+    thresholds: list[int]
+    entries: list[CatalogEntry]
+
+
+class AchievementCatalog:
+    """
+    Katalog aktywnych achievementów z indeksem po typie eventu.
+
+    Co najwyżej raz na ``check_interval`` sekund tabela achievementów jest
+    czytana ponownie (kilkaset krótkich wierszy) i porównywana z ostatnią
+    wersją przez hash wszystkich kolumn katalogu; indeksy są przebudowywane
+    tylko, gdy coś się zmieniło - także nazwa, typ eventu czy kolejność.
+    ``invalidate`` wymusza sprawdzenie przy następnym użyciu.
+    """
+
+    def __init__(self, check_interval: float = 60.0):
+        self.check_interval = check_interval
+
+        self._entries: list[CatalogEntry] = []
+        self._by_id: dict[int, CatalogEntry] = {}
+        self._by_type: dict[str, _EventIndex] = {}
+        self._stamp: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+        # Zwiększana przy każdym wczytaniu katalogu
+        self.version = 0
+        self._loads = 0
+
+    def invalidate(self):
+        """Wymusza wczytanie katalogu przy następnym użyciu"""
+        with self._lock:
+            self._stamp = None
+
+    @staticmethod
+    def _load_rows(db: Session) -> list[tuple]:
+        """Wszystkie achievementy: pola CatalogEntry (w tej kolejności) i is_active, po ID"""
+        return [
+            tuple(row)
+            for row in db.query(
+                Achievement.id,
+                Achievement.code,
+                Achievement.name,
+                Achievement.description,
+                Achievement.icon,
+                Achievement.event_type,
+                Achievement.threshold,
+                Achievement.order_index,
+                Achievement.is_active,
+            ).order_by(Achievement.id)
+        ]
+
+    def refresh(self, db: Session) -> "AchievementCatalog":
+        """Wczytuje katalog, jeśli jest pusty albo achievementy w bazie się zmieniły"""
+        now = time.monotonic()
+        if self._stamp is not None and now - self._checked_at < self.check_interval:
+            return self
+
+        rows = self._load_rows(db)
+        stamp = hash(tuple(rows))
+        with self._lock:
+            self._checked_at = now
+            if stamp == self._stamp:
+                return self
+
+        entries = [
+            CatalogEntry(*row[:-1])
+            for row in rows
+            if row[-1]
+        ]
+        entries.sort(key=lambda entry: (entry.order_index, entry.id))
+
+        grouped: dict[str, list[CatalogEntry]] = {}
+        for entry in entries:
+            grouped.setdefault(entry.event_type, []).append(entry)
+        by_type = {}
+        for event_type, group in grouped.items():
+            group.sort(key=lambda entry: entry.threshold)
+            by_type[event_type] = _EventIndex(
+                thresholds=[entry.threshold for entry in group],
+                entries=group,
+            )
+
+        with self._lock:
+            self._entries = entries
+            self._by_id = {entry.id: entry for entry in entries}
+            self._by_type = by_type
+            self._stamp = stamp
+            self.version += 1
+            self._loads += 1
+        return self
+
+    def all(self) -> list[CatalogEntry]:
+        """Wszystkie aktywne achievementy, w kolejności wyświetlania"""
+        return self._entries
+
+    def get(self, achievement_id: int) -> Optional[CatalogEntry]:
+        """Achievement po ID"""
+        return self._by_id.get(achievement_id)
+
+    def reached(self, event_type: str, value: int) -> list[CatalogEntry]:
+        """Achievementy danego typu eventu z progiem nie większym niż ``value``"""
+        index = self._by_type.get(event_type)
+        if index is None:
+            return []
+        return index.entries[:bisect_right(index.thresholds, value)]
+
+    def stats(self) -> dict:
+        return {
+            "achievements": len(self._entries),
+            "event_types": len(self._by_type),
+            "version": self.version,
+            "loads": self._loads,
+        }
+
+
+class UnlockedAchievementsCache:
+    """
+    Cache LRU odblokowanych achievementów: user_id -> bitset.
+
+    Bit o numerze równym ID achievementu jest ustawiony, jeśli użytkownik
+    go odblokował; bitset to zwykły int, więc zajmuje kilka bajtów na
+    użytkownika. Wpisy są uzupełniane (write-through) dopiero po
+    commicie odblokowania, więc cache nigdy nie wyprzedza bazy.
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[int, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def to_bits(achievement_ids) -> int:
+        """Bitset z ID achievementów"""
+        bits = 0
+        for achievement_id in achievement_ids:
+            bits |= 1 << achievement_id
+        return bits
+
+    @staticmethod
+    def to_ids(bits: int) -> set[int]:
+        """ID achievementów z bitsetu"""
+        ids = set()
+        while bits:
+            low = bits & -bits
+            ids.add(low.bit_length() - 1)
+            bits ^= low
+        return ids
+
+    def get(self, user_id: int) -> Optional[int]:
+        """Bitset użytkownika albo None, jeśli nie ma go w cache"""
+        with self._lock:
+            bits = self._entries.get(user_id)
+            if bits is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._hits += 1
+            return bits
+
+    def put(self, user_id: int, bits: int):
+        """Zapisuje pełny bitset użytkownika wczytany z bazy"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = bits
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def add(self, user_id: int, achievement_id: int):
+        """Dopisuje odblokowany achievement, jeśli użytkownik jest w cache"""
+        with self._lock:
+            bits = self._entries.get(user_id)
+            if bits is not None:
+                self._entries[user_id] = bits | (1 << achievement_id)
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """Usuwa wpis użytkownika (albo wszystkie)"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            "evictions": self._evictions,
+        }
+
+
+# Globalny katalog
+_catalog: Optional[AchievementCatalog] = None
+
+
+def get_achievement_catalog() -> AchievementCatalog:
+    """Zwraca globalny katalog achievementów"""
+    global _catalog
+    if _catalog is None:
+        _catalog = AchievementCatalog(
+            check_interval=settings.achievement_catalog_check_interval,
+        )
+    return _catalog
+
+
+# Globalny cache odblokowanych achievementów
+_unlocked_cache: Optional[UnlockedAchievementsCache] = None
+
+
+def get_unlocked_cache() -> UnlockedAchievementsCache:
+    """Zwraca globalny cache odblokowanych achievementów"""
+    global _unlocked_cache
+    if _unlocked_cache is None:
+        _unlocked_cache = UnlockedAchievementsCache(
+            max_entries=settings.achievement_unlocked_cache_size,
+        )
+    return _unlocked_cache
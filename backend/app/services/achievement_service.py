@@ -2,24 +2,73 @@
 Achievement Service - zarządzanie achievementami użytkowników.
 """
 
+from datetime import datetime
+from sqlalchemy import and_, event as sa_event, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
 from typing import Optional
 
 from app.models.achievement import Achievement, UserAchievement
 from app.models.user import User
+from app.services.achievement_catalog import (
+    CatalogEntry,
+    UnlockedAchievementsCache,
+    get_achievement_catalog,
+    get_unlocked_cache,
+)
 from app.services.event_service import GameEvent, EventService
 
 
+def insert_ignoring_duplicates(db: Session, rows: list[dict]) -> list[tuple[int, int]]:
+    """
+    INSERT ... ON CONFLICT DO NOTHING do user_achievements.
+
+    Zwraca pary (user_id, achievement_id) faktycznie wstawionych wierszy;
+    już istniejące są pomijane przez bazę, bez wcześniejszego SELECT-a.
+    """
+    if not rows:
+        return []
+
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = (
+        insert(UserAchievement)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["user_id", "achievement_id"])
+        .returning(UserAchievement.user_id, UserAchievement.achievement_id)
+    )
+    return [tuple(row) for row in db.execute(stmt)]
+
+
+def _cache_after_commit(db: Session, inserted: list[tuple[int, int]]):
+    """Dopisuje odblokowania do cache dopiero po udanym commicie"""
+    if not inserted:
+        return
+
+    rolled_back = False
+
+    def write_through(session):
+        if rolled_back:
+            return
+        cache = get_unlocked_cache()
+        for user_id, achievement_id in inserted:
+            cache.add(user_id, achievement_id)
+
+    def discard(session):
+        nonlocal rolled_back
+        rolled_back = True
+
+    sa_event.listen(db, "after_commit", write_through, once=True)
+    sa_event.listen(db, "after_rollback", discard, once=True)
+
+
 class AchievementService:
     """Serwis do zarządzania achievementami"""
 
     @staticmethod
-    def get_all_achievements(db: Session) -> list[Achievement]:
-        """Pobiera wszystkie aktywne achievementy"""
-        return db.query(Achievement).filter(
-            Achievement.is_active == True
-        ).order_by(Achievement.order_index).all()
+    def get_all_achievements(db: Session) -> list[CatalogEntry]:
+        """Pobiera wszystkie aktywne achievementy (z katalogu w pamięci)"""
+        return get_achievement_catalog().refresh(db).all()
 
     @staticmethod
     def get_user_achievements(db: Session, user_id: int) -> list[UserAchievement]:
@@ -28,13 +77,79 @@ class AchievementService:
             UserAchievement.user_id == user_id
         ).all()
 
+    @staticmethod
+    def get_user_achievements_view(
+        db: Session, discord_id: str
+    ) -> Optional[tuple[list[tuple[CatalogEntry, datetime]], list[CatalogEntry]]]:
+        """
+        Odblokowane (z datą) i zablokowane achievementy użytkownika.
+
+        Jedno zapytanie: użytkownik LEFT JOIN jego user_achievements;
+        opisy achievementów pochodzą z katalogu w pamięci. Zwraca None,
+        jeśli użytkownik nie istnieje. Obie listy są w kolejności
+        wyświetlania; achievementy wyłączone (is_active = false) są pomijane.
+        """
+        rows = db.execute(
+            select(User.id, UserAchievement.achievement_id, UserAchievement.unlocked_at)
+            .outerjoin(UserAchievement, UserAchievement.user_id == User.id)
+            .where(User.discord_id == discord_id)
+        ).all()
+        if not rows:
+            return None
+
+        user_id = rows[0].id
+        unlocked_at = {
+            row.achievement_id: row.unlocked_at
+            for row in rows
+            if row.achievement_id is not None
+        }
+        # Pełny zbiór odblokowanych jest pod ręką - odśwież cache
+        get_unlocked_cache().put(user_id, UnlockedAchievementsCache.to_bits(unlocked_at))
+
+        unlocked = []
+        locked = []
+        for achievement in get_achievement_catalog().refresh(db).all():
+            if achievement.id in unlocked_at:
+                unlocked.append((achievement, unlocked_at[achievement.id]))
+            else:
+                locked.append(achievement)
+        return unlocked, locked
+
     @staticmethod
     def get_user_unlocked_achievement_ids(db: Session, user_id: int) -> set[int]:
         """Pobiera ID odblokowanych achievementów użytkownika"""
-        results = db.query(UserAchievement.achievement_id).filter(
-            UserAchievement.user_id == user_id
-        ).all()
-        return {r[0] for r in results}
+        bits = AchievementService.get_unlocked_bits(db, {user_id})[user_id]
+        return UnlockedAchievementsCache.to_ids(bits)
+
+    @staticmethod
+    def get_unlocked_bits(db: Session, user_ids: set[int]) -> dict[int, int]:
+        """
+        Bitsety odblokowanych achievementów użytkowników.
+
+        Użytkownicy z cache nie kosztują zapytania; pozostali są wczytywani
+        jednym zapytaniem i dopisywani do cache.
+        """
+        cache = get_unlocked_cache()
+        bits = {}
+        missing = set()
+        for user_id in user_ids:
+            cached = cache.get(user_id)
+            if cached is None:
+                missing.add(user_id)
+            else:
+                bits[user_id] = cached
+
+        if missing:
+            loaded = dict.fromkeys(missing, 0)
+            for user_id, achievement_id in db.query(
+                UserAchievement.user_id, UserAchievement.achievement_id
+            ).filter(UserAchievement.user_id.in_(missing)):
+                loaded[user_id] |= 1 << achievement_id
+            for user_id, user_bits in loaded.items():
+                cache.put(user_id, user_bits)
+            bits.update(loaded)
+
+        return bits
 
     @staticmethod
     def has_achievement(db: Session, user_id: int, achievement_code: str) -> bool:
@@ -49,59 +164,76 @@ class AchievementService:
     @staticmethod
     def unlock_achievement(db: Session, user_id: int, achievement_id: int) -> Optional[UserAchievement]:
         """Odblokowuje achievement dla użytkownika"""
-        # Check if already unlocked
-        existing = db.query(UserAchievement).filter(
+        inserted = insert_ignoring_duplicates(
+            db, [{"user_id": user_id, "achievement_id": achievement_id}]
+        )
+        if not inserted:
+            return None  # Already unlocked
+
+        _cache_after_commit(db, inserted)
+        db.commit()
+        return db.query(UserAchievement).filter(
             and_(
                 UserAchievement.user_id == user_id,
                 UserAchievement.achievement_id == achievement_id
             )
         ).first()
 
-        if existing:
-            return None  # Already unlocked
-
-        user_achievement = UserAchievement(
-            user_id=user_id,
-            achievement_id=achievement_id
-        )
-        db.add(user_achievement)
-        db.commit()
-        db.refresh(user_achievement)
-        return user_achievement
-
     @staticmethod
-    def check_and_unlock_achievements(event: GameEvent, db: Session) -> list[Achievement]:
+    def check_and_unlock_achievements(event: GameEvent, db: Session) -> list[CatalogEntry]:
         """
         Sprawdza i odblokowuje achievementy na podstawie eventu.
         Zwraca listę nowo odblokowanych achievementów.
         """
-        unlocked = []
+        unlocked = AchievementService.check_and_unlock_batch([event], db)
+        db.commit()
+        return [achievement for _, achievement in unlocked]
 
-        # Pobierz achievementy pasujące do typu eventu
-        matching_achievements = db.query(Achievement).filter(
-            and_(
-                Achievement.event_type == event.event_type.value,
-                Achievement.is_active == True
-            )
-        ).all()
+    @staticmethod
+    def check_and_unlock_batch(
+        events: list[GameEvent], db: Session
+    ) -> list[tuple[int, CatalogEntry]]:
+        """
+        Sprawdza i odblokowuje achievementy dla partii eventów.
+
+        Progi sprawdzane są w katalogu w pamięci, odblokowane achievementy
+        w bitsetach z cache - użytkownik, który ma już wszystko, co osiągnął,
+        nie kosztuje żadnego zapytania. Nowe wpisy są wstawiane jednym
+        INSERT ... ON CONFLICT DO NOTHING; commit robi wywołujący.
+        Zwraca pary (user_id, achievement) nowo odblokowanych.
+        """
+        if not events:
+            return []
+
+        catalog = get_achievement_catalog().refresh(db)
 
-        # Pobierz już odblokowane achievementy użytkownika
-        unlocked_ids = AchievementService.get_user_unlocked_achievement_ids(db, event.user_id)
+        # Achievementy z progiem <= wartość eventu (bisect)
+        reached = [
+            (event.user_id, catalog.reached(event.event_type.value, event.value))
+            for event in events
+        ]
+        reached = [(user_id, entries) for user_id, entries in reached if entries]
+        if not reached:
+            return []
 
-        for achievement in matching_achievements:
-            # Skip if already unlocked
-            if achievement.id in unlocked_ids:
-                continue
+        bits = AchievementService.get_unlocked_bits(
+            db, {user_id for user_id, _ in reached}
+        )
 
-            # Check threshold
-            if event.value >= achievement.threshold:
-                user_achievement = AchievementService.unlock_achievement(
-                    db, event.user_id, achievement.id
-                )
-                if user_achievement:
-                    unlocked.append(achievement)
+        rows = []
+        for user_id, entries in reached:
+            for achievement in entries:
+                if bits[user_id] >> achievement.id & 1:
+                    continue
+                rows.append({"user_id": user_id, "achievement_id": achievement.id})
+                bits[user_id] |= 1 << achievement.id
 
-        return unlocked
+        inserted = insert_ignoring_duplicates(db, rows)
+        _cache_after_commit(db, inserted)
+        return [
+            (user_id, catalog.get(achievement_id))
+            for user_id, achievement_id in inserted
+        ]
 
     @staticmethod
     def get_user_stats(db: Session, user_id: int) -> dict:
@@ -120,9 +252,9 @@ class AchievementService:
 
 
 # Rejestracja handlera w EventService przy imporcie
-def _achievement_event_handler(event: GameEvent, db: Session):
-    """Handler eventów dla achievementów"""
-    AchievementService.check_and_unlock_achievements(event, db)
+def _achievement_event_handler(events: list[GameEvent], db: Session):
+    """Handler partii eventów dla achievementów"""
+    AchievementService.check_and_unlock_batch(events, db)
 
 
-EventService.register_handler(_achievement_event_handler)
+EventService.register_batch_handler(_achievement_event_handler)
@@ -1,85 +1,71 @@
+import textwrap
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, Optional
 
 import chess
-import chess.pgn
-import io
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
 from app.models import User, BotGame, GameResult
 from app.schemas import BotGameCreate, BotMoveRequest, BotMoveResponse
 from app.enums import BotDifficulty
 from app.services.stockfish_service import (
     get_stockfish_service,
+    get_async_stockfish_service,
     DIFFICULTY_SETTINGS,
 )
+from app.services.opening_book import get_opening_book
 
 
-class BotGameService:
-    def __init__(self, db: Session):
-        self.db = db
-        self.stockfish = get_stockfish_service()
+class _BotGameRules:
+    """
+    Board logic shared by BotGameService and AsyncBotGameService.
 
-    def create_game(self, player: User, game_data: BotGameCreate) -> BotGame:
-        """Create a new game against the bot."""
-        game = BotGame(
+    Nothing here touches the session; the services commit.
+    """
+
+    def __init__(self):
+        self.opening_book = get_opening_book()
+
+    def _new_game(self, player: User, game_data: BotGameCreate) -> BotGame:
+        return BotGame(
             player_id=player.id,
             difficulty=game_data.difficulty.value,
             player_color=game_data.player_color,
             status="active",
         )
 
-        self.db.add(game)
-        self.db.commit()
-        self.db.refresh(game)
-
-        # If player is black, bot makes the first move
-        if game_data.player_color == "black":
-            self._make_bot_move(game)
-            self.db.commit()
-            self.db.refresh(game)
-
-        return game
-
-    def get_game_by_id(self, game_id: int) -> Optional[BotGame]:
-        """Get a bot game by ID."""
-        return self.db.query(BotGame).filter(BotGame.id == game_id).first()
-
-    def get_user_games(self, user: User, limit: int = 10) -> list[BotGame]:
-        """Get recent bot games for a user."""
-        return (
-            self.db.query(BotGame)
-            .filter(BotGame.player_id == user.id)
-            .order_by(BotGame.created_at.desc())
-            .limit(limit)
-            .all()
-        )
-
-    def make_move(
+    def _play_player_move(
         self,
         game: BotGame,
         player: User,
         move_request: BotMoveRequest,
-    ) -> BotMoveResponse:
-        """Process a player's move and get the bot's response."""
+    ) -> tuple[BotMoveResponse, Optional[chess.Board]]:
+        """
+        Validate and apply the player's move.
+
+        Returns the board after the move when it's the bot's turn, or None
+        when the move was rejected or ended the game.
+        """
         if game.status != "active":
             return BotMoveResponse(
                 valid=False,
                 message="Game is not active"
-            )
+            ), None
 
         if game.player_id != player.id:
             return BotMoveResponse(
                 valid=False,
                 message="You are not the player in this game"
-            )
+            ), None
 
         if not game.is_player_turn:
             return BotMoveResponse(
                 valid=False,
                 message="It's not your turn"
-            )
+            ), None
 
         # Validate the move
         board = chess.Board(game.current_fen)
@@ -90,73 +76,58 @@ class BotGameService:
             return BotMoveResponse(
                 valid=False,
                 message="Invalid move format"
-            )
+            ), None
 
         if move not in board.legal_moves:
             return BotMoveResponse(
                 valid=False,
                 message="Illegal move"
-            )
+            ), None
 
         # Get SAN notation
         player_move_san = board.san(move)
 
         # Make the player's move
         board.push(move)
-        game.add_move(move_request.move)
+        game.add_move(move_request.move, player_move_san)
         game.current_fen = board.fen()
 
         # Check if game is over after player's move
         game_over, result = self._check_game_over(board)
 
         if game_over:
-            game.status = "completed"
-            game.result = result.value if result else None
-            game.ended_at = datetime.utcnow()
-            game.pgn = self._generate_pgn(game)
-            self.db.commit()
+            self._end_game(game, result)
 
             return BotMoveResponse(
                 valid=True,
                 player_move_san=player_move_san,
-                fen_after=board.fen(),
+                fen_after=game.current_fen,
                 game_over=True,
                 result=result,
-            )
-
-        # Bot's turn
-        bot_move_uci = self._make_bot_move(game)
-        board = chess.Board(game.current_fen)
+            ), None
 
-        # Get bot move SAN (need to get it before push)
-        bot_move = chess.Move.from_uci(bot_move_uci)
-        board_before_bot = chess.Board(game.current_fen)
-        # Go back one move to get the SAN
-        moves_list = game.moves_list
-        if len(moves_list) >= 2:
-            temp_board = chess.Board()
-            for m in moves_list[:-1]:
-                temp_board.push(chess.Move.from_uci(m))
-            bot_move_san = temp_board.san(bot_move)
-        else:
-            temp_board = chess.Board(game.current_fen)
-            # This is a workaround - we need the board state before bot move
-            bot_move_san = bot_move_uci
+        return BotMoveResponse(
+            valid=True,
+            player_move_san=player_move_san,
+        ), board
 
-        # Check if game is over after bot's move
-        game_over, result = self._check_game_over(chess.Board(game.current_fen))
+    def _finish_bot_turn(
+        self,
+        game: BotGame,
+        board: chess.Board,
+        response: BotMoveResponse,
+        bot_move_uci: str,
+        bot_move_san: str,
+    ) -> BotMoveResponse:
+        """Check for game over after the bot's move and build the response."""
+        game_over, result = self._check_game_over(board)
 
         if game_over:
-            game.status = "completed"
-            game.result = result.value if result else None
-            game.ended_at = datetime.utcnow()
-            game.pgn = self._generate_pgn(game)
-
-        self.db.commit()
+            self._end_game(game, result)
 
         return BotMoveResponse(
             valid=True,
-            player_move_san=player_move_san,
+            player_move_san=response.player_move_san,
             bot_move_uci=bot_move_uci,
             bot_move_san=bot_move_san,
             fen_after=game.current_fen,
@@ -164,38 +135,31 @@ class BotGameService:
             result=result,
         )
 
-    def resign(self, game: BotGame, player: User) -> GameResult:
-        """Resign from the game."""
-        if game.player_id != player.id:
-            raise ValueError("Not your game")
-
-        # Player resigns = bot wins
-        if game.player_color == "white":
-            result = GameResult.BLACK_WIN
-        else:
-            result = GameResult.WHITE_WIN
-
+    def _end_game(self, game: BotGame, result: Optional[GameResult]):
+        """Mark the game as completed and store its PGN."""
         game.status = "completed"
-        game.result = result.value
+        game.result = result.value if result else None
         game.ended_at = datetime.utcnow()
         game.pgn = self._generate_pgn(game)
 
-        self.db.commit()
-        return result
-
-    def _make_bot_move(self, game: BotGame) -> str:
-        """Make a move for the bot."""
-        difficulty = BotDifficulty(game.difficulty)
-        bot_move = self.stockfish.get_best_move(game.current_fen, difficulty)
+    def _book_move(self, board: chess.Board, difficulty: BotDifficulty) -> Optional[str]:
+        """Get an opening book move, if the game is still in book."""
+        max_plies = DIFFICULTY_SETTINGS[difficulty]["book_plies"]
+        move = self.opening_book.choose_move(board, max_plies)
+        return move.uci() if move else None
 
-        board = chess.Board(game.current_fen)
+    def _apply_bot_move(self, game: BotGame, board: chess.Board, bot_move: str) -> tuple[str, str]:
+        """Apply the bot's move to the board and game state."""
         move = chess.Move.from_uci(bot_move)
+
+        # SAN has to be computed on the pre-move board
+        bot_move_san = board.san(move)
         board.push(move)
 
-        game.add_move(bot_move)
+        game.add_move(bot_move, bot_move_san)
         game.current_fen = board.fen()
 
-        return bot_move
+        return bot_move, bot_move_san
 
     def _check_game_over(self, board: chess.Board) -> tuple[bool, Optional[GameResult]]:
         """Check if the game is over and return the result."""
@@ -218,57 +182,327 @@ class BotGameService:
         return False, None
 
     def _generate_pgn(self, game: BotGame) -> str:
-        """Generate PGN for the game."""
-        pgn_game = chess.pgn.Game()
+        """Generate PGN for the game from its stored SAN movetext."""
+        return _build_pgn(
+            created_at=game.created_at,
+            player_color=game.player_color,
+            difficulty=game.difficulty,
+            username=game.player.username,
+            rating=game.player.rating,
+            result=game.result,
+            moves=game.moves,
+            san_moves=game.san_moves,
+        )
 
-        # Set headers
-        pgn_game.headers["Event"] = "Chessly Bot Game"
-        pgn_game.headers["Site"] = "Chessly"
-        pgn_game.headers["Date"] = game.created_at.strftime("%Y.%m.%d")
 
-        difficulty = BotDifficulty(game.difficulty)
-        bot_elo = DIFFICULTY_SETTINGS[difficulty]["elo"]
+class BotGameService(_BotGameRules):
+    def __init__(self, db: Session):
+        super().__init__()
+        self.db = db
+        self.stockfish = get_stockfish_service()
+
+    def create_game(self, player: User, game_data: BotGameCreate) -> BotGame:
+        """Create a new game against the bot."""
+        game = self._new_game(player, game_data)
+        self.db.add(game)
+        self.db.commit()
+        self.db.refresh(game)
+
+        # If player is black, bot makes the first move
+        if game_data.player_color == "black":
+            self._make_bot_move(game, chess.Board(game.current_fen))
+            self.db.commit()
+            self.db.refresh(game)
+
+        return game
+
+    def get_game_by_id(self, game_id: int) -> Optional[BotGame]:
+        """Get a bot game by ID."""
+        return self.db.query(BotGame).filter(BotGame.id == game_id).first()
+
+    def get_user_games(self, user: User, limit: int = 10) -> list[BotGame]:
+        """Get recent bot games for a user."""
+        return (
+            self.db.query(BotGame)
+            .filter(BotGame.player_id == user.id)
+            .order_by(BotGame.created_at.desc())
+            .limit(limit)
+            .all()
+        )
+
+    def make_move(
+        self,
+        game: BotGame,
+        player: User,
+        move_request: BotMoveRequest,
+    ) -> BotMoveResponse:
+        """
+        Process a player's move and get the bot's response.
+
+        A single board is carried through the player's move, the bot's
+        search, SAN generation and the game-over checks, so a move costs
+        the same regardless of how long the game is.
+        """
+        response, board = self._play_player_move(game, player, move_request)
+        if board is None:
+            if response.game_over:
+                self.db.commit()
+            return response
+
+        bot_move_uci, bot_move_san = self._make_bot_move(game, board)
+        response = self._finish_bot_turn(game, board, response, bot_move_uci, bot_move_san)
+        self.db.commit()
+        return response
+
+    def resign(self, game: BotGame, player: User) -> GameResult:
+        """Resign from the game."""
+        if game.player_id != player.id:
+            raise ValueError("Not your game")
 
+        # Player resigns = bot wins
         if game.player_color == "white":
-            pgn_game.headers["White"] = game.player.username
-            pgn_game.headers["Black"] = f"Stockfish ({difficulty.value})"
-            pgn_game.headers["WhiteElo"] = str(game.player.rating)
-            pgn_game.headers["BlackElo"] = str(bot_elo)
-        else:
-            pgn_game.headers["White"] = f"Stockfish ({difficulty.value})"
-            pgn_game.headers["Black"] = game.player.username
-            pgn_game.headers["WhiteElo"] = str(bot_elo)
-            pgn_game.headers["BlackElo"] = str(game.player.rating)
-
-        if game.result:
-            result_map = {
-                GameResult.WHITE_WIN.value: "1-0",
-                GameResult.BLACK_WIN.value: "0-1",
-                GameResult.DRAW.value: "1/2-1/2",
-            }
-            pgn_game.headers["Result"] = result_map.get(game.result, "*")
+            result = GameResult.BLACK_WIN
         else:
-            pgn_game.headers["Result"] = "*"
+            result = GameResult.WHITE_WIN
 
-        # Add moves
-        node = pgn_game
-        board = chess.Board()
+        self._end_game(game, result)
 
-        for move_uci in game.moves_list:
-            move = chess.Move.from_uci(move_uci)
-            node = node.add_variation(move)
-            board.push(move)
+        self.db.commit()
+        return result
 
-        # Convert to string
-        exporter = chess.pgn.StringExporter(headers=True, variations=True, comments=True)
-        return pgn_game.accept(exporter)
+    def _make_bot_move(self, game: BotGame, board: chess.Board) -> tuple[str, str]:
+        """Make a move for the bot. Returns the move in UCI and SAN."""
+        difficulty = BotDifficulty(game.difficulty)
+        bot_move = self._book_move(board, difficulty)
+        if bot_move is None:
+            bot_move = self.stockfish.get_best_move(board.fen(), difficulty)
+        return self._apply_bot_move(game, board, bot_move)
 
     def get_pgn(self, game: BotGame) -> str:
-        """Get PGN for the game, generating if needed."""
-        if game.pgn:
+        """
+        Get PGN for the game, generating if needed.
+
+        Only finished games store their PGN; an active game's PGN would be
+        out of date after the next move.
+        """
+        if game.pgn and game.status != "active":
             return game.pgn
 
         pgn = self._generate_pgn(game)
-        game.pgn = pgn
-        self.db.commit()
+        if game.status != "active":
+            game.pgn = pgn
+            self.db.commit()
         return pgn
+
+    def iter_pgn(self, game_ids: list[int], batch_size: int = 500) -> Iterator[str]:
+        """
+        Yield PGN for many games.
+
+        Reads plain column rows in batches instead of hydrating BotGame
+        objects, and uses the stored PGN of finished games as is; active
+        games are always built from their current moves.
+        """
+        stmt = (
+            _pgn_rows_query()
+            .where(BotGame.id.in_(game_ids))
+            .order_by(BotGame.id)
+        )
+        return self._iter_pgn_rows(stmt, batch_size)
+
+    def iter_user_pgn(self, user: User, batch_size: int = 500) -> Iterator[str]:
+        """Yield PGN for a user's whole bot game history, oldest first."""
+        stmt = (
+            _pgn_rows_query()
+            .where(BotGame.player_id == user.id)
+            .order_by(BotGame.created_at, BotGame.id)
+        )
+        return self._iter_pgn_rows(stmt, batch_size)
+
+    def _iter_pgn_rows(self, stmt, batch_size: int) -> Iterator[str]:
+        # Server-side cursor: rows are fetched batch_size at a time, so
+        # memory stays flat regardless of how many games match
+        result = self.db.execute(
+            stmt.execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for row in result:
+            yield _row_pgn(row) + "\n\n"
+
+
+class AsyncBotGameService(_BotGameRules):
+    """
+    Asyncio variant of BotGameService for the routes that wait on the bot.
+
+    Runs on an ``AsyncSession`` and awaits the async engine pool, so the
+    request suspends on queries and the search instead of holding a
+    threadpool worker, and the session never leaves the event loop.
+    """
+
+    def __init__(self, db: AsyncSession):
+        super().__init__()
+        self.db = db
+        self.async_stockfish = get_async_stockfish_service()
+
+    async def create_game(self, player: User, game_data: BotGameCreate) -> BotGame:
+        """Create a new game against the bot, awaiting the bot's first move."""
+        game = self._new_game(player, game_data)
+        self.db.add(game)
+        await self.db.commit()
+        await self.db.refresh(game)
+
+        if game_data.player_color == "black":
+            await self._make_bot_move(game, chess.Board(game.current_fen))
+            await self.db.commit()
+
+        return game
+
+    async def get_game_by_id(self, game_id: int) -> Optional[BotGame]:
+        """
+        Get a bot game by ID, with its player.
+
+        The player is loaded here because ending the game builds its PGN
+        from the player's name and rating, and an async session can't
+        lazy load it.
+        """
+        result = await self.db.execute(
+            select(BotGame)
+            .where(BotGame.id == game_id)
+            .options(selectinload(BotGame.player))
+        )
+        return result.scalar_one_or_none()
+
+    async def make_move(
+        self,
+        game: BotGame,
+        player: User,
+        move_request: BotMoveRequest,
+    ) -> BotMoveResponse:
+        """Process a player's move, awaiting the bot's search."""
+        response, board = self._play_player_move(game, player, move_request)
+        if board is None:
+            if response.game_over:
+                await self.db.commit()
+            return response
+
+        bot_move_uci, bot_move_san = await self._make_bot_move(game, board)
+        response = self._finish_bot_turn(game, board, response, bot_move_uci, bot_move_san)
+        await self.db.commit()
+        return response
+
+    async def _make_bot_move(self, game: BotGame, board: chess.Board) -> tuple[str, str]:
+        """Make a move for the bot, awaiting the engine search."""
+        difficulty = BotDifficulty(game.difficulty)
+        bot_move = self._book_move(board, difficulty)
+        if bot_move is None:
+            bot_move = await self.async_stockfish.get_best_move(board.fen(), difficulty)
+        return self._apply_bot_move(game, board, bot_move)
+
+
+PGN_RESULTS = {
+    GameResult.WHITE_WIN.value: "1-0",
+    GameResult.BLACK_WIN.value: "0-1",
+    GameResult.DRAW.value: "1/2-1/2",
+}
+
+
+def _pgn_rows_query():
+    """Columns needed to export a game's PGN."""
+    return select(
+        BotGame.created_at,
+        BotGame.player_color,
+        BotGame.difficulty,
+        BotGame.status,
+        BotGame.result,
+        BotGame.moves,
+        BotGame.san_moves,
+        BotGame.pgn,
+        User.username,
+        User.rating,
+    ).join(User, BotGame.player_id == User.id)
+
+
+def _row_pgn(row) -> str:
+    if row.pgn and row.status != "active":
+        return row.pgn
+    return _build_pgn(
+        created_at=row.created_at,
+        player_color=row.player_color,
+        difficulty=row.difficulty,
+        username=row.username,
+        rating=row.rating,
+        result=row.result,
+        moves=row.moves,
+        san_moves=row.san_moves,
+    )
+
+
+def _san_list(moves: str, san_moves: str) -> list[str]:
+    """SAN moves of a game, replaying the UCI moves for games that predate SAN storage."""
+    uci_list = moves.split() if moves else []
+    san_list = san_moves.split() if san_moves else []
+    if len(san_list) == len(uci_list):
+        return san_list
+
+    board = chess.Board()
+    san_list = []
+    for move_uci in uci_list:
+        move = chess.Move.from_uci(move_uci)
+        san_list.append(board.san(move))
+        board.push(move)
+    return san_list
+
+
+def _pgn_header(name: str, value: str) -> str:
+    value = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'[{name} "{value}"]'
+
+
+def _build_pgn(
+    created_at: datetime,
+    player_color: str,
+    difficulty: str,
+    username: str,
+    rating: int,
+    result: Optional[str],
+    moves: str,
+    san_moves: str,
+) -> str:
+    """Build a PGN string from headers and the SAN movetext."""
+    difficulty = BotDifficulty(difficulty)
+    bot_name = f"Stockfish ({difficulty.value})"
+    bot_elo = DIFFICULTY_SETTINGS[difficulty]["elo"]
+    pgn_result = PGN_RESULTS.get(result, "*") if result else "*"
+
+    if player_color == "white":
+        white, black = username, bot_name
+        white_elo, black_elo = rating, bot_elo
+    else:
+        white, black = bot_name, username
+        white_elo, black_elo = bot_elo, rating
+
+    headers = [
+        _pgn_header("Event", "Chessly Bot Game"),
+        _pgn_header("Site", "Chessly"),
+        _pgn_header("Date", created_at.strftime("%Y.%m.%d")),
+        _pgn_header("Round", "?"),
+        _pgn_header("White", white),
+        _pgn_header("Black", black),
+        _pgn_header("Result", pgn_result),
+        _pgn_header("WhiteElo", str(white_elo)),
+        _pgn_header("BlackElo", str(black_elo)),
+    ]
+
+    # Bot games always start from the standard position
+    tokens = []
+    for ply, san in enumerate(_san_list(moves, san_moves)):
+        if ply % 2 == 0:
+            tokens.append(f"{ply // 2 + 1}.")
+        tokens.append(san)
+    tokens.append(pgn_result)
+
+    movetext = textwrap.fill(
+        " ".join(tokens),
+        width=79,
+        break_long_words=False,
+        break_on_hyphens=False,
+    )
+    return "\n".join(headers) + "\n\n" + movetext
@@ -0,0 +1,211 @@
+import asyncio
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import chess
+
+from app.config import settings
+
+
+def monotonic_ms() -> int:
+    """Monotonic time in milliseconds."""
+    return time.monotonic_ns() // 1_000_000
+
+
+@dataclass
+class GameClock:
+    """
+    Server-side chess clock with millisecond precision.
+
+    Only the side to move has a running clock; ``press`` charges the mover
+    for the time since their clock started, adds the increment and starts
+    the opponent's clock. Times come from the monotonic clock, never from
+    the client.
+    """
+
+    white_ms: int
+    black_ms: int
+    increment_ms: int = 0
+    # Color whose clock is running, None while stopped
+    running: Optional[chess.Color] = None
+    started_at_ms: int = 0
+
+    def remaining(self, color: chess.Color, now_ms: Optional[int] = None) -> int:
+        """Time left for a color, counting the running clock."""
+        left = self.white_ms if color == chess.WHITE else self.black_ms
+        if self.running == color:
+            left -= (now_ms if now_ms is not None else monotonic_ms()) - self.started_at_ms
+        return max(0, left)
+
+    def start(self, color: chess.Color, now_ms: Optional[int] = None):
+        """Start a color's clock."""
+        self.running = color
+        self.started_at_ms = now_ms if now_ms is not None else monotonic_ms()
+
+    def stop(self, now_ms: Optional[int] = None) -> int:
+        """Stop the running clock and charge its side. Returns the time spent."""
+        if self.running is None:
+            return 0
+
+        now_ms = now_ms if now_ms is not None else monotonic_ms()
+        spent = now_ms - self.started_at_ms
+        if self.running == chess.WHITE:
+            self.white_ms -= spent
+        else:
+            self.black_ms -= spent
+        self.running = None
+        return spent
+
+    def press(self, now_ms: Optional[int] = None) -> int:
+        """
+        End the mover's turn and start the opponent's clock.
+
+        Returns the time the mover spent. The increment is only added if
+        the mover still had time left.
+        """
+        now_ms = now_ms if now_ms is not None else monotonic_ms()
+        mover = self.running
+        spent = self.stop(now_ms)
+
+        if mover == chess.WHITE:
+            if self.white_ms > 0:
+                self.white_ms += self.increment_ms
+        elif mover == chess.BLACK:
+            if self.black_ms > 0:
+                self.black_ms += self.increment_ms
+
+        if mover is not None:
+            self.start(not mover, now_ms)
+        return spent
+
+    def flagged(self, now_ms: Optional[int] = None) -> Optional[chess.Color]:
+        """The color that ran out of time, if any."""
+        for color in (chess.WHITE, chess.BLACK):
+            if self.remaining(color, now_ms) <= 0:
+                return color
+        return None
+
+    def deadline(self) -> Optional[float]:
+        """Monotonic time (seconds) at which the running side flags."""
+        if self.running is None:
+            return None
+        left = self.white_ms if self.running == chess.WHITE else self.black_ms
+        return (self.started_at_ms + left) / 1000
+
+
+class TimerWheel:
+    """
+    Hashed timing wheel for clock flag deadlines.
+
+    Deadlines are hashed by tick into a fixed ring of slots; one asyncio
+    task advances the wheel every tick and only looks at the slot whose
+    time has come. Scheduling and cancelling are O(1), so tens of
+    thousands of running clocks cost one task and a few set operations
+    per move. Deadlines further away than one turn of the wheel stay in
+    their slot until the right round.
+
+    Keys are game codes: scheduling a key again replaces its deadline.
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 1024):
+        self.tick = tick
+        self.slots = slots
+
+        self._wheel: list[set[str]] = [set() for _ in range(slots)]
+        # key -> (deadline, slot index)
+        self._entries: dict[str, tuple[float, int]] = {}
+        # Last tick the wheel has processed
+        self._last_tick = math.floor(time.monotonic() / tick)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._fired = 0
+
+    def _tick_of(self, when: float) -> int:
+        return math.ceil(when / self.tick)
+
+    def schedule(self, key: str, deadline: float):
+        """Fire ``key`` at ``deadline`` (monotonic seconds)."""
+        with self._lock:
+            self._remove(key)
+            # A deadline in an already processed tick goes in the next one
+            slot = max(self._tick_of(deadline), self._last_tick + 1) % self.slots
+            self._entries[key] = (deadline, slot)
+            self._wheel[slot].add(key)
+
+    def cancel(self, key: str):
+        """Forget a key's deadline."""
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._wheel[entry[1]].discard(key)
+
+    def advance(self, now: float) -> list[str]:
+        """Collect the keys due in the ticks between the last call and now."""
+        now_tick = math.floor(now / self.tick)
+        due = []
+        with self._lock:
+            # After a long stall, one pass over the ring covers every slot
+            first = max(self._last_tick + 1, now_tick - self.slots + 1)
+            for tick in range(first, now_tick + 1):
+                slot = self._wheel[tick % self.slots]
+                # Keys for later turns of the wheel stay in the slot
+                for key in [key for key in slot if self._entries[key][0] <= now]:
+                    slot.discard(key)
+                    del self._entries[key]
+                    due.append(key)
+            self._last_tick = max(self._last_tick, now_tick)
+        return due
+
+    async def run(self, on_expire: Callable[[str], Awaitable[None]]):
+        """Advance the wheel forever, calling ``on_expire`` for due keys."""
+        while True:
+            await asyncio.sleep(self.tick)
+            for key in self.advance(time.monotonic()):
+                self._fired += 1
+                # Own task, so one slow handler doesn't hold up the wheel
+                asyncio.create_task(self._call(on_expire, key))
+
+    async def _call(self, on_expire: Callable[[str], Awaitable[None]], key: str):
+        try:
+            await on_expire(key)
+        except Exception as e:
+            print(f"Clock timeout handler failed for {key}: {e}")
+
+    def start(self, on_expire: Callable[[str], Awaitable[None]]):
+        """Start the wheel task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(on_expire))
+
+    async def stop(self):
+        """Stop the wheel task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "scheduled": len(self._entries),
+            "fired": self._fired,
+            "tick": self.tick,
+            "slots": self.slots,
+        }
+
+
+# Global timer wheel for live game clocks
+timer_wheel = TimerWheel(
+    tick=settings.clock_tick_ms / 1000,
+    slots=settings.clock_wheel_slots,
+)
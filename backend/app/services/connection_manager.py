@@ -1,6 +1,308 @@
-from typing import Dict, Set
-from fastapi import WebSocket
+import asyncio
 import json
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Set
+from fastapi import WebSocket
+
+from app.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis is only needed with REDIS_URL set
+    aioredis = None
+
+try:
+    import orjson
+except ImportError:  # optional, faster JSON encoding
+    orjson = None
+
+
+def encode_message(message: dict) -> str:
+    """Serialize a message into a JSON text frame."""
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+# Called with (game_code, envelope) for every message published to a room
+Deliver = Callable[[str, dict], Awaitable[None]]
+
+# Called with (game_code, message) for messages sent by other processes
+RemoteHandler = Callable[[str, dict], None]
+
+PLAYER = "player"
+SPECTATOR = "spectator"
+
+
+class Broker(ABC):
+    """
+    Delivers room messages to every process that serves the room.
+
+    ``publish`` hands the envelope to the ``deliver`` callback of each
+    subscribed process, including the publishing one.
+    """
+
+    def __init__(self):
+        self.deliver: Optional[Deliver] = None
+
+    @abstractmethod
+    async def publish(self, game_code: str, envelope: dict):
+        """Send an envelope to every process serving the room."""
+
+    @abstractmethod
+    async def join(self, game_code: str, role: str):
+        """A local connection with ``role`` entered the room."""
+
+    @abstractmethod
+    async def leave(self, game_code: str, role: str):
+        """A local connection with ``role`` left the room."""
+
+    @abstractmethod
+    async def count(self, game_code: str, role: str) -> int:
+        """Connections with ``role`` in the room across all processes."""
+
+    async def follow(self, game_code: str):
+        """Receive the room's messages without a local connection in it."""
+
+    async def unfollow(self, game_code: str):
+        """Stop receiving the messages of a followed room."""
+
+    async def close(self):
+        pass
+
+
+class InMemoryBroker(Broker):
+    """Single-process broker: messages go straight to local connections."""
+
+    def __init__(self):
+        super().__init__()
+        self._counts: Dict[tuple[str, str], int] = {}
+
+    async def publish(self, game_code: str, envelope: dict):
+        await self.deliver(game_code, envelope)
+
+    async def join(self, game_code: str, role: str):
+        key = (game_code, role)
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    async def leave(self, game_code: str, role: str):
+        key = (game_code, role)
+        remaining = self._counts.get(key, 0) - 1
+        if remaining > 0:
+            self._counts[key] = remaining
+        else:
+            self._counts.pop(key, None)
+
+    async def count(self, game_code: str, role: str) -> int:
+        return self._counts.get((game_code, role), 0)
+
+
+class RedisBroker(Broker):
+    """
+    Redis pub/sub broker for running several workers.
+
+    Each process subscribes to the channels of rooms it has connections
+    in, and a reader task hands incoming envelopes to ``deliver``. Room
+    sizes are kept in Redis counters so they add up across workers.
+
+    ``client`` can be any ``redis.asyncio``-compatible client, e.g.
+    ``fakeredis.aioredis.FakeRedis`` in tests.
+    """
+
+    CHANNEL_PREFIX = "chessly:game:"
+    COUNT_PREFIX = "chessly:room:"
+    COUNT_TTL = 86400  # stale counters (crashed workers) expire after a day
+
+    def __init__(self, url: str = "", client=None):
+        super().__init__()
+        if client is None:
+            if aioredis is None:
+                raise RuntimeError("REDIS_URL is set but the redis package is not installed")
+            client = aioredis.from_url(url)
+
+        self.client = client
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._rooms: Dict[str, int] = {}
+
+    def _channel(self, game_code: str) -> str:
+        return f"{self.CHANNEL_PREFIX}{game_code}"
+
+    def _count_key(self, game_code: str, role: str) -> str:
+        return f"{self.COUNT_PREFIX}{game_code}:{role}"
+
+    async def publish(self, game_code: str, envelope: dict):
+        await self.client.publish(self._channel(game_code), json.dumps(envelope))
+
+    async def join(self, game_code: str, role: str):
+        key = self._count_key(game_code, role)
+        await self.client.incr(key)
+        await self.client.expire(key, self.COUNT_TTL)
+        await self._subscribe(game_code)
+
+    async def leave(self, game_code: str, role: str):
+        key = self._count_key(game_code, role)
+        if await self.client.decr(key) <= 0:
+            await self.client.delete(key)
+        await self._unsubscribe(game_code)
+
+    async def follow(self, game_code: str):
+        await self._subscribe(game_code)
+
+    async def unfollow(self, game_code: str):
+        await self._unsubscribe(game_code)
+
+    async def _subscribe(self, game_code: str):
+        # Local connections and follows of a room share one subscription
+        self._rooms[game_code] = self._rooms.get(game_code, 0) + 1
+        if self._rooms[game_code] == 1:
+            if self._pubsub is None:
+                self._pubsub = self.client.pubsub()
+            await self._pubsub.subscribe(self._channel(game_code))
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+
+    async def _unsubscribe(self, game_code: str):
+        remaining = self._rooms.get(game_code, 0) - 1
+        if remaining > 0:
+            self._rooms[game_code] = remaining
+        else:
+            self._rooms.pop(game_code, None)
+            await self._pubsub.unsubscribe(self._channel(game_code))
+
+    async def count(self, game_code: str, role: str) -> int:
+        value = await self.client.get(self._count_key(game_code, role))
+        return max(0, int(value)) if value else 0
+
+    async def _read(self):
+        """Hand messages from subscribed channels to ``deliver``."""
+        while self._rooms:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message is None or message["type"] != "message":
+                    continue
+
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                game_code = channel[len(self.CHANNEL_PREFIX):]
+
+                await self.deliver(game_code, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Redis broker error: {e}")
+                await asyncio.sleep(1.0)
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        await self.client.aclose()
+
+
+class Outbox:
+    """
+    Bounded outbound queue of one connection, drained by its own task.
+
+    Broadcasting only enqueues, so a slow or dead receiver never holds up
+    the others. When the queue is full the ``policy`` applies: "drop"
+    discards the oldest queued message, "close" gives up on the
+    connection. A send that fails also gives up on it; sends that take
+    longer than the timeout are caught by ``ConnectionManager``'s
+    watchdog through ``is_stuck``, instead of arming a timer per send.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_fail: Callable[[WebSocket], Awaitable[None]],
+        max_size: int = 64,
+        policy: str = "close",
+    ):
+        self.websocket = websocket
+        self.max_size = max_size
+        self.policy = policy
+        self.dropped = 0
+        self.failed = False
+        # Loop time the current send started, None while idle
+        self.sending_since: Optional[float] = None
+
+        self._frames: deque[str] = deque()
+        self._wakeup = asyncio.Event()
+        self._on_fail = on_fail
+        self._task = asyncio.create_task(self._run())
+
+    def put(self, frame: str):
+        """Queue a serialized message without waiting."""
+        if self.failed:
+            return
+        if len(self._frames) >= self.max_size:
+            if self.policy != "drop":
+                self.fail()
+                return
+            self._frames.popleft()
+            self.dropped += 1
+        self._frames.append(frame)
+        self._wakeup.set()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._frames:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            frame = self._frames.popleft()
+            self.sending_since = loop.time()
+            try:
+                await self.websocket.send_text(frame)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Connection closed
+                self.failed = True
+                await self._on_fail(self.websocket)
+                return
+            self.sending_since = None
+
+    def is_stuck(self, now: float, timeout: float) -> bool:
+        """Check whether the current send has been going on too long."""
+        return self.sending_since is not None and now - self.sending_since > timeout
+
+    def fail(self):
+        """Give up on the connection: stop sending and evict it."""
+        if self.failed:
+            return
+        self.failed = True
+        self._task.cancel()
+        asyncio.create_task(self._on_fail(self.websocket))
+
+    @property
+    def pending(self) -> int:
+        return len(self._frames)
+
+    def close(self):
+        """Stop sending. Queued messages are discarded."""
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+
+
+def create_broker(redis_url: str = "") -> Broker:
+    """Redis broker if a URL is configured, in-memory otherwise."""
+    if redis_url:
+        return RedisBroker(redis_url)
+    return InMemoryBroker()
 
 
 class ConnectionManager:
@@ -9,15 +311,80 @@ class ConnectionManager:
 
     Each game has a room identified by its code.
     Players in the same room receive broadcasts of moves.
+
+    Broadcasts go through a broker, so with the Redis broker a room can
+    span several worker processes. Sockets are only known to the process
+    that accepted them; messages carry connection ids instead.
+
+    Every connection sends through its own bounded ``Outbox``; connections
+    that fail, time out or fall too far behind are evicted from the room.
+
+    Connections are either players or spectators. Both receive room
+    broadcasts, but connection counts are kept per role, so spectators
+    don't affect the player count used to start games.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        broker: Optional[Broker] = None,
+        queue_size: int = 64,
+        queue_policy: str = "close",
+        send_timeout: float = 5.0,
+    ):
+        self.broker = broker or InMemoryBroker()
+        self.broker.deliver = self._deliver
+        # Identifies this process in published envelopes
+        self.origin = uuid.uuid4().hex
+
         # game_code -> set of WebSocket connections
         self.active_connections: Dict[str, Set[WebSocket]] = {}
         # websocket -> (game_code, user_id)
         self.connection_info: Dict[WebSocket, tuple[str, int]] = {}
+        # websocket -> PLAYER or SPECTATOR
+        self.connection_roles: Dict[WebSocket, str] = {}
+        # websocket -> connection id used to exclude it from broadcasts
+        self.connection_ids: Dict[WebSocket, str] = {}
+        # Rooms whose messages this process follows without a connection
+        self.followed_rooms: Set[str] = set()
 
-    async def connect(self, websocket: WebSocket, game_code: str, user_id: int):
+        # websocket -> outbound queue
+        self.outboxes: Dict[WebSocket, Outbox] = {}
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+        self.send_timeout = send_timeout
+        self.evictions = 0
+        self._watchdog: Optional[asyncio.Task] = None
+
+        self.remote_handlers: list[RemoteHandler] = []
+
+    def add_remote_handler(self, handler: RemoteHandler):
+        """Register a callback for messages broadcast by other processes."""
+        self.remote_handlers.append(handler)
+
+    async def follow(self, game_code: str):
+        """
+        Receive a room's messages without a connection in it.
+
+        Remote handlers then see moves made on other processes, e.g. for a
+        game this process loaded to serve a REST request.
+        """
+        if game_code not in self.followed_rooms:
+            self.followed_rooms.add(game_code)
+            await self.broker.follow(game_code)
+
+    async def unfollow_except(self, keep):
+        """Stop following rooms that aren't in ``keep``."""
+        for game_code in self.followed_rooms - set(keep):
+            self.followed_rooms.discard(game_code)
+            await self.broker.unfollow(game_code)
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        game_code: str,
+        user_id: int,
+        role: str = PLAYER,
+    ):
         """Accept a WebSocket connection and add it to a game room."""
         await websocket.accept()
 
@@ -26,8 +393,20 @@ class ConnectionManager:
 
         self.active_connections[game_code].add(websocket)
         self.connection_info[websocket] = (game_code, user_id)
+        self.connection_roles[websocket] = role
+        self.connection_ids[websocket] = uuid.uuid4().hex
+        self.outboxes[websocket] = Outbox(
+            websocket,
+            self._evict,
+            max_size=self.queue_size,
+            policy=self.queue_policy,
+        )
+        if self._watchdog is None or self._watchdog.done():
+            self._watchdog = asyncio.create_task(self._watch_sends())
+
+        await self.broker.join(game_code, role)
 
-    def disconnect(self, websocket: WebSocket):
+    async def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection from its game room."""
         if websocket in self.connection_info:
             game_code, _ = self.connection_info[websocket]
@@ -40,38 +419,95 @@ class ConnectionManager:
                     del self.active_connections[game_code]
 
             del self.connection_info[websocket]
+            del self.connection_ids[websocket]
+            role = self.connection_roles.pop(websocket)
+            self.outboxes.pop(websocket).close()
+
+            await self.broker.leave(game_code, role)
+
+    async def _watch_sends(self):
+        """Evict connections whose current send exceeds the send timeout."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.send_timeout / 4)
+            now = loop.time()
+            for outbox in list(self.outboxes.values()):
+                if outbox.is_stuck(now, self.send_timeout):
+                    outbox.fail()
+
+    async def _evict(self, websocket: WebSocket):
+        """Drop a connection that can't keep up and close it."""
+        if websocket not in self.connection_info:
+            return
+
+        self.evictions += 1
+        await self.disconnect(websocket)
+        try:
+            await asyncio.wait_for(websocket.close(code=1011), self.send_timeout)
+        except Exception:
+            pass
 
     async def send_personal(self, websocket: WebSocket, message: dict):
-        """Send a message to a specific connection."""
-        await websocket.send_json(message)
+        """
+        Send a message to a specific connection.
+
+        Dropped if the connection has no outbox, i.e. it was evicted or
+        disconnected: writing to the socket directly could raise on a
+        closed connection in the caller's receive loop.
+        """
+        outbox = self.outboxes.get(websocket)
+        if outbox is not None:
+            # Queued behind broadcasts, so the order is kept
+            outbox.put(encode_message(message))
 
     async def broadcast_to_game(self, game_code: str, message: dict, exclude: WebSocket = None):
         """Broadcast a message to all connections in a game room."""
-        if game_code not in self.active_connections:
-            return
-
-        for connection in self.active_connections[game_code]:
-            if connection != exclude:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    # Connection might be closed
-                    pass
+        await self.broker.publish(
+            game_code,
+            {
+                "origin": self.origin,
+                "exclude": self.connection_ids.get(exclude),
+                "message": message,
+            },
+        )
 
     async def broadcast_to_all(self, game_code: str, message: dict):
         """Broadcast a message to all connections in a game room including sender."""
+        await self.broadcast_to_game(game_code, message)
+
+    async def _deliver(self, game_code: str, envelope: dict):
+        """Send a published message to this process's connections in the room."""
+        message = envelope["message"]
+
+        if envelope["origin"] != self.origin:
+            for handler in self.remote_handlers:
+                try:
+                    handler(game_code, message)
+                except Exception as e:
+                    print(f"Remote message handler failed: {e}")
+
         if game_code not in self.active_connections:
             return
 
-        for connection in self.active_connections[game_code]:
-            try:
-                await connection.send_json(message)
-            except Exception:
-                pass
+        # Serialized once for the whole room. Only enqueues; each
+        # connection's outbox sends concurrently
+        frame = encode_message(message)
+        exclude = envelope.get("exclude")
+        for connection in list(self.active_connections[game_code]):
+            if exclude is None or self.connection_ids.get(connection) != exclude:
+                self.outboxes[connection].put(frame)
 
-    def get_connection_count(self, game_code: str) -> int:
-        """Get the number of connections in a game room."""
-        return len(self.active_connections.get(game_code, set()))
+    def get_connection_count(self, game_code: str, role: str = PLAYER) -> int:
+        """Get the number of connections in a game room on this process."""
+        return sum(
+            1
+            for connection in self.active_connections.get(game_code, set())
+            if self.connection_roles[connection] == role
+        )
+
+    async def get_room_size(self, game_code: str, role: str = PLAYER) -> int:
+        """Get the number of connections in a game room across all processes."""
+        return await self.broker.count(game_code, role)
 
     def get_user_id(self, websocket: WebSocket) -> int | None:
         """Get the user ID associated with a WebSocket connection."""
@@ -79,6 +515,33 @@ class ConnectionManager:
             return self.connection_info[websocket][1]
         return None
 
+    def stats(self) -> dict:
+        """Connection and outbound queue stats for this process."""
+        return {
+            "rooms": len(self.active_connections),
+            "connections": len(self.connection_info),
+            "spectators": sum(
+                1 for role in self.connection_roles.values() if role == SPECTATOR
+            ),
+            "queued": sum(outbox.pending for outbox in self.outboxes.values()),
+            "dropped": sum(outbox.dropped for outbox in self.outboxes.values()),
+            "evictions": self.evictions,
+        }
+
+    async def close(self):
+        """Stop senders and release broker resources."""
+        self.followed_rooms.clear()
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+        for outbox in self.outboxes.values():
+            outbox.close()
+        await self.broker.close()
+
 
 # Global connection manager instance
-manager = ConnectionManager()
+manager = ConnectionManager(
+    create_broker(settings.redis_url),
+    queue_size=settings.ws_queue_size,
+    queue_policy=settings.ws_queue_policy,
+    send_timeout=settings.ws_send_timeout,
+)
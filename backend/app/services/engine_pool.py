@@ -0,0 +1,470 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Hashable, Iterator, Mapping, Optional
+
+import chess.engine
+
+
+# Builds the UCI options for a profile from the engine's supported options
+OptionsFactory = Callable[[Mapping[str, chess.engine.Option]], dict]
+
+
+class EnginePoolExhausted(RuntimeError):
+    """Raised when no engine frees up in time or the wait queue is full."""
+
+
+def resolve_pool_size(configured: int) -> int:
+    """Resolve the configured pool size, 0 meaning one engine per CPU core."""
+    if configured > 0:
+        return configured
+    return os.cpu_count() or 1
+
+
+def split_pool_size(total: int) -> tuple[int, int]:
+    """
+    Split one engine budget between the sync and async pools.
+
+    The async pool serves the bot move endpoints, so it gets the larger
+    half. Each pool keeps at least one engine.
+    """
+    async_size = max(1, (total + 1) // 2)
+    sync_size = max(1, total - async_size)
+    return sync_size, async_size
+
+
+@dataclass
+class EngineSlot:
+    """A single engine process owned by the pool, plus its usage stats."""
+
+    index: int
+    engine: Any = None  # SimpleEngine or UciProtocol, depending on the pool
+    busy: bool = False
+    retired: bool = False
+    searches: int = 0
+    failures: int = 0
+    restarts: int = 0
+    search_time: float = 0.0
+    wait_time: float = 0.0
+
+    # Option state, so unchanged options aren't resent on every search
+    profile: Optional[Hashable] = None
+    options: dict = field(default_factory=dict)
+    reconfigures: int = 0
+
+    def reset_options(self):
+        self.profile = None
+        self.options = {}
+
+    def stats(self) -> dict:
+        """Usage stats for this engine."""
+        return {
+            "index": self.index,
+            "running": self.engine is not None,
+            "busy": self.busy,
+            "searches": self.searches,
+            "failures": self.failures,
+            "restarts": self.restarts,
+            "profile": self.profile,
+            "reconfigures": self.reconfigures,
+            "avg_search_ms": _avg_ms(self.search_time, self.searches),
+            "avg_wait_ms": _avg_ms(self.wait_time, self.searches),
+        }
+
+
+def _avg_ms(total: float, count: int) -> float:
+    return round(total * 1000 / count, 2) if count else 0.0
+
+
+class _BaseEnginePool:
+    """Slot bookkeeping and stats shared by the sync and async pools."""
+
+    def __init__(
+        self,
+        stockfish_path: str,
+        size: int = 1,
+        max_waiters: int = 64,
+        checkout_timeout: float = 10.0,
+    ):
+        self.stockfish_path = stockfish_path
+        self.size = size
+        self.max_waiters = max_waiters
+        self.checkout_timeout = checkout_timeout
+
+        self._slots = [EngineSlot(index=i) for i in range(size)]
+
+        # Wait queue stats
+        self._waiting = 0
+        self._peak_waiting = 0
+        self._checkouts = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+
+    def _idle_slot(self, profile: Optional[Hashable] = None) -> Optional[EngineSlot]:
+        """
+        Pick an idle slot.
+
+        Prefers a running engine already configured for ``profile``, then a
+        running engine not pinned to any profile, then one that still has to
+        be started, and only then reconfigures an engine pinned elsewhere.
+        """
+        idle = [s for s in self._slots if not s.busy]
+        if not idle:
+            return None
+
+        running = [s for s in idle if s.engine is not None]
+        if profile is None:
+            return running[0] if running else idle[0]
+
+        for slot in running:
+            if slot.profile == profile:
+                return slot
+        for slot in running:
+            if slot.profile is None:
+                return slot
+        for slot in idle:
+            if slot.engine is None:
+                return slot
+        return running[0]
+
+    @staticmethod
+    def _options_to_send(
+        slot: EngineSlot,
+        profile: Optional[Hashable],
+        options_for: Optional[OptionsFactory],
+    ) -> Optional[dict]:
+        """Options that differ from the engine's current state, if any."""
+        if profile is None or options_for is None or slot.profile == profile:
+            return None
+
+        wanted = options_for(slot.engine.options)
+        changed = {
+            name: value for name, value in wanted.items()
+            if slot.options.get(name) != value
+        }
+        if not changed:
+            slot.profile = profile
+            return None
+
+        # Forget the old values until the engine has accepted the new ones,
+        # so a failed configure gets them resent next time
+        slot.profile = None
+        for name in changed:
+            slot.options.pop(name, None)
+        return changed
+
+    @staticmethod
+    def _options_sent(slot: EngineSlot, profile: Hashable, changed: dict):
+        slot.options.update(changed)
+        slot.profile = profile
+        slot.reconfigures += 1
+
+    def _enter_queue(self):
+        if self._waiting >= self.max_waiters:
+            self._rejected += 1
+            raise EnginePoolExhausted("Too many searches queued for Stockfish")
+
+        self._waiting += 1
+        self._peak_waiting = max(self._peak_waiting, self._waiting)
+
+    def _timed_out(self) -> EnginePoolExhausted:
+        self._timeouts += 1
+        return EnginePoolExhausted("Timed out waiting for a Stockfish engine")
+
+    def _take(self, slot: EngineSlot, waited: float) -> EngineSlot:
+        slot.busy = True
+        slot.wait_time += waited
+        self._checkouts += 1
+        self._wait_time += waited
+        self._max_wait = max(self._max_wait, waited)
+        return slot
+
+    def _put_back(self, slot: EngineSlot, healthy: bool, elapsed: float):
+        """Mark the slot idle. Returns the engine to stop, if it must go."""
+        engine = None
+        slot.searches += 1
+        slot.search_time += elapsed
+
+        if not healthy:
+            slot.failures += 1
+        if not healthy or slot.retired:
+            engine, slot.engine = slot.engine, None
+            slot.retired = False
+            slot.reset_options()
+
+        slot.busy = False
+        return engine
+
+    def _detach_idle(self) -> list:
+        """Detach idle engines for shutdown; busy ones are stopped on checkin."""
+        engines = []
+        for slot in self._slots:
+            if slot.busy:
+                slot.retired = True
+            elif slot.engine is not None:
+                engines.append(slot.engine)
+                slot.engine = None
+                slot.reset_options()
+        return engines
+
+    def _count_restart(self, slot: EngineSlot):
+        if slot.searches:
+            slot.restarts += 1
+
+    def _stats(self) -> dict:
+        return {
+            "size": self.size,
+            "running": sum(1 for s in self._slots if s.engine is not None),
+            "busy": sum(1 for s in self._slots if s.busy),
+            "waiting": self._waiting,
+            "peak_waiting": self._peak_waiting,
+            "max_waiters": self.max_waiters,
+            "checkouts": self._checkouts,
+            "rejected": self._rejected,
+            "timeouts": self._timeouts,
+            "avg_wait_ms": _avg_ms(self._wait_time, self._checkouts),
+            "max_wait_ms": round(self._max_wait * 1000, 2),
+            "engines": [slot.stats() for slot in self._slots],
+        }
+
+
+class EnginePool(_BaseEnginePool):
+    """
+    Fixed-size pool of Stockfish processes.
+
+    Engines are started lazily on first checkout. Callers that find every
+    engine busy wait in a bounded queue; an engine that dies mid-search is
+    discarded on checkin and respawned by the next checkout.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def checkout(
+        self,
+        profile: Optional[Hashable] = None,
+        options_for: Optional[OptionsFactory] = None,
+    ) -> Iterator[chess.engine.SimpleEngine]:
+        """
+        Borrow an engine for the duration of the ``with`` block.
+
+        When a ``profile`` is given, an engine already configured for it is
+        preferred, and ``options_for`` is only consulted (and only changed
+        options sent) when the engine was last used with another profile.
+        """
+        slot = self._acquire(profile)
+        started = time.monotonic()
+        healthy = True
+
+        try:
+            if slot.engine is None:
+                slot.engine = self._spawn(slot)
+
+            changed = self._options_to_send(slot, profile, options_for)
+            if changed:
+                slot.engine.configure(changed)
+                self._options_sent(slot, profile, changed)
+
+            yield slot.engine
+        except chess.engine.EngineTerminatedError:
+            healthy = False
+            raise
+        except Exception:
+            healthy = self._is_alive(slot.engine)
+            raise
+        finally:
+            self._release(slot, healthy, time.monotonic() - started)
+
+    def _acquire(self, profile: Optional[Hashable]) -> EngineSlot:
+        with self._cond:
+            slot = self._idle_slot(profile)
+            waited = 0.0
+
+            if slot is None:
+                self._enter_queue()
+                wait_started = time.monotonic()
+                deadline = wait_started + self.checkout_timeout
+
+                try:
+                    while slot is None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise self._timed_out()
+                        self._cond.wait(remaining)
+                        slot = self._idle_slot(profile)
+                finally:
+                    self._waiting -= 1
+
+                waited = time.monotonic() - wait_started
+
+            return self._take(slot, waited)
+
+    def _release(self, slot: EngineSlot, healthy: bool, elapsed: float):
+        with self._cond:
+            engine = self._put_back(slot, healthy, elapsed)
+            self._cond.notify()
+
+        if engine is not None:
+            self._quit(engine)
+
+    def _spawn(self, slot: EngineSlot) -> chess.engine.SimpleEngine:
+        try:
+            engine = chess.engine.SimpleEngine.popen_uci(self.stockfish_path)
+        except Exception as e:
+            raise RuntimeError(f"Failed to start Stockfish: {e}")
+
+        self._count_restart(slot)
+        return engine
+
+    @staticmethod
+    def _is_alive(engine: Optional[chess.engine.SimpleEngine]) -> bool:
+        if engine is None:
+            return True
+        try:
+            engine.ping()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(engine: chess.engine.SimpleEngine):
+        try:
+            engine.quit()
+        except Exception:
+            # Process is already gone
+            pass
+
+    def close(self):
+        """Stop all engines. Busy engines are stopped when checked back in."""
+        with self._cond:
+            engines = self._detach_idle()
+
+        for engine in engines:
+            self._quit(engine)
+
+    def stats(self) -> dict:
+        """Pool-wide and per-engine usage stats for sizing the pool."""
+        with self._cond:
+            return self._stats()
+
+
+class AsyncEnginePool(_BaseEnginePool):
+    """
+    Asyncio counterpart of EnginePool.
+
+    Engines are driven through python-chess's asyncio UCI protocol, so a
+    search only holds a coroutine, never a worker thread.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = asyncio.Condition()
+
+    @asynccontextmanager
+    async def checkout(
+        self,
+        profile: Optional[Hashable] = None,
+        options_for: Optional[OptionsFactory] = None,
+    ) -> AsyncIterator[chess.engine.UciProtocol]:
+        """Borrow an engine for the duration of the ``async with`` block."""
+        slot = await self._acquire(profile)
+        started = time.monotonic()
+        healthy = True
+
+        try:
+            if slot.engine is None:
+                slot.engine = await self._spawn(slot)
+
+            changed = self._options_to_send(slot, profile, options_for)
+            if changed:
+                await slot.engine.configure(changed)
+                self._options_sent(slot, profile, changed)
+
+            yield slot.engine
+        except chess.engine.EngineTerminatedError:
+            healthy = False
+            raise
+        except Exception:
+            healthy = await self._is_alive(slot.engine)
+            raise
+        finally:
+            await self._release(slot, healthy, time.monotonic() - started)
+
+    async def _acquire(self, profile: Optional[Hashable]) -> EngineSlot:
+        async with self._cond:
+            slot = self._idle_slot(profile)
+            waited = 0.0
+
+            if slot is None:
+                self._enter_queue()
+                wait_started = time.monotonic()
+
+                try:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(lambda: self._idle_slot() is not None),
+                        timeout=self.checkout_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    raise self._timed_out()
+                finally:
+                    self._waiting -= 1
+
+                slot = self._idle_slot(profile)
+                waited = time.monotonic() - wait_started
+
+            return self._take(slot, waited)
+
+    async def _release(self, slot: EngineSlot, healthy: bool, elapsed: float):
+        async with self._cond:
+            engine = self._put_back(slot, healthy, elapsed)
+            self._cond.notify()
+
+        if engine is not None:
+            await self._quit(engine)
+
+    async def _spawn(self, slot: EngineSlot) -> chess.engine.UciProtocol:
+        try:
+            _, engine = await chess.engine.popen_uci(self.stockfish_path)
+        except Exception as e:
+            raise RuntimeError(f"Failed to start Stockfish: {e}")
+
+        self._count_restart(slot)
+        return engine
+
+    @staticmethod
+    async def _is_alive(engine: Optional[chess.engine.UciProtocol]) -> bool:
+        if engine is None:
+            return True
+        try:
+            await engine.ping()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    async def _quit(engine: chess.engine.UciProtocol):
+        try:
+            await engine.quit()
+        except Exception:
+            # Process is already gone
+            pass
+
+    async def close(self):
+        """Stop all engines. Busy engines are stopped when checked back in."""
+        async with self._cond:
+            engines = self._detach_idle()
+
+        for engine in engines:
+            await self._quit(engine)
+
+    def stats(self) -> dict:
+        """Pool-wide and per-engine usage stats for sizing the pool."""
+        # Single-threaded event loop: no lock needed for a consistent read
+        return self._stats()
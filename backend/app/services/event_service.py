@@ -8,13 +8,23 @@ Eventy:
 - GAME_WON - użytkownik wygrał grę
 - CHECKMATE_DELIVERED - użytkownik dał mata
 - CATEGORY_COMPLETED_BASICS - użytkownik ukończył wszystkie lekcje z kategorii basics
+
+Eventy trafiają do kolejki (EventBus) i są obsługiwane w tle, partiami,
+poza ścieżką żądania. Tryb synchroniczny (EVENT_BUS_MODE=sync) obsługuje je
+od razu, w sesji wywołującego - np. w testach.
 """
 
+import threading
+import time
+from collections import deque
 from enum import Enum
 from dataclasses import dataclass
 from typing import Optional, Callable, Any
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.database import SessionLocal
+
 
 class EventType(str, Enum):
     PUZZLE_SOLVED = "PUZZLE_SOLVED"
@@ -37,26 +47,220 @@ class GameEvent:
     metadata: Optional[dict] = None
 
 
+# Eventy, których wartość to licznik narastający (łączna liczba puzzli,
+# lekcji, wygranych, dni streaka) - z kilku takich eventów wystarczy ten
+# z największą wartością
+CUMULATIVE_EVENT_TYPES = frozenset({
+    EventType.PUZZLE_SOLVED,
+    EventType.LESSON_COMPLETED,
+    EventType.STREAK_DAY,
+    EventType.GAME_WON,
+})
+
+
+def coalesce_events(events: list[GameEvent]) -> list[GameEvent]:
+    """
+    Łączy eventy tego samego typu dla tego samego użytkownika.
+
+    Łączone są tylko eventy z licznikiem narastającym i bez metadanych -
+    zostaje ten z największą wartością. Pozostałe (np. każdy
+    CHECKMATE_DELIVERED, lekcje z kategorią w metadanych) przechodzą bez
+    zmian, w kolejności.
+    """
+    coalesced: list[GameEvent] = []
+    # (user_id, typ) -> pozycja eventu w coalesced
+    latest: dict[tuple[int, EventType], int] = {}
+    for event in events:
+        if event.event_type not in CUMULATIVE_EVENT_TYPES or event.metadata:
+            coalesced.append(event)
+            continue
+
+        key = (event.user_id, event.event_type)
+        index = latest.get(key)
+        if index is None:
+            latest[key] = len(coalesced)
+            coalesced.append(event)
+        elif event.value >= coalesced[index].value:
+            coalesced[index] = event
+    return coalesced
+
+
+class EventBus:
+    """
+    Kolejka eventów w procesie, obsługiwana w tle.
+
+    ``publish`` tylko dodaje event do kolejki. Zadanie w tle (lifespan
+    aplikacji) wywołuje ``drain``, który bierze eventy partiami, łączy je
+    per użytkownik i obsługuje całą partię w jednej sesji i jednej
+    transakcji.
+
+    Partia, której obsługa się nie powiodła, jest ponawiana z rosnącym
+    odstępem (``retry_backoff``, potem 2x, 4x...) - handlery są
+    idempotentne (ON CONFLICT DO NOTHING), więc ponowienie jest bezpieczne.
+    Po ``max_attempts`` próbach eventy trafiają do ``dead_letter``, skąd
+    można je obejrzeć lub opublikować ponownie.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        max_attempts: int = 5,
+        retry_backoff: float = 1.0,
+        dead_letter_size: int = 10000,
+    ):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        # deque: append/popleft są bezpieczne między wątkami
+        self._queue: deque[GameEvent] = deque()
+        # Partie do ponowienia: (czas ponowienia, liczba prób, eventy)
+        self._retries: list[tuple[float, int, list[GameEvent]]] = []
+        # Eventy, których nie udało się obsłużyć po max_attempts próbach
+        self.dead_letter: deque[GameEvent] = deque(maxlen=dead_letter_size)
+        # Jedno opróżnianie naraz (zadanie w tle i zamknięcie aplikacji)
+        self._drain_lock = threading.Lock()
+        self._processed = 0
+        self._batches = 0
+        self._retried = 0
+        self._failed = 0
+
+    def publish(self, event: GameEvent):
+        """Dodaje event do kolejki"""
+        self._queue.append(event)
+
+    def drain(self, retry_all: bool = False) -> int:
+        """
+        Obsługuje wszystkie eventy z kolejki i partie, których czas
+        ponowienia minął (z ``retry_all`` - wszystkie, np. przy zamknięciu
+        aplikacji). Zwraca liczbę obsłużonych eventów.
+        """
+        processed = 0
+        with self._drain_lock:
+            now = time.monotonic()
+            due, waiting = [], []
+            for retry in self._retries:
+                (due if retry_all or retry[0] <= now else waiting).append(retry)
+            self._retries = waiting
+            for _, attempts, batch in due:
+                processed += self._process(batch, attempts)
+
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._queue.popleft())
+                processed += self._process(batch)
+        return processed
+
+    def _process(self, batch: list[GameEvent], attempts: int = 0) -> int:
+        db = SessionLocal()
+        try:
+            EventService.dispatch(coalesce_events(batch), db, raise_errors=True)
+            db.commit()
+            self._processed += len(batch)
+            self._batches += 1
+            return len(batch)
+        except Exception as e:
+            db.rollback()
+            attempts += 1
+            if attempts < self.max_attempts:
+                delay = self.retry_backoff * 2 ** (attempts - 1)
+                self._retries.append((time.monotonic() + delay, attempts, batch))
+                self._retried += len(batch)
+                print(f"Failed to handle {len(batch)} events (attempt {attempts}), retrying in {delay:.1f}s: {e}")
+            else:
+                self.dead_letter.extend(batch)
+                self._failed += len(batch)
+                print(f"Failed to handle {len(batch)} events after {attempts} attempts, dead-lettered: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def __len__(self) -> int:
+        """Eventy w kolejce i czekające na ponowienie"""
+        return len(self._queue) + sum(len(batch) for _, _, batch in self._retries)
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._queue),
+            "retrying": sum(len(batch) for _, _, batch in self._retries),
+            "processed": self._processed,
+            "batches": self._batches,
+            "retried": self._retried,
+            "failed": self._failed,
+            "dead_letter": len(self.dead_letter),
+        }
+
+
+# Globalna kolejka eventów
+event_bus = EventBus(
+    batch_size=settings.event_bus_batch_size,
+    max_attempts=settings.event_bus_max_attempts,
+    retry_backoff=settings.event_bus_retry_backoff,
+)
+
+
 class EventService:
     """Serwis do emisji i obsługi eventów"""
 
     _handlers: list[Callable[[GameEvent, Session], Any]] = []
+    _batch_handlers: list[Callable[[list[GameEvent], Session], Any]] = []
 
     @classmethod
     def register_handler(cls, handler: Callable[[GameEvent, Session], Any]):
-        """Rejestruje handler eventów (np. AchievementService)"""
+        """Rejestruje handler pojedynczych eventów"""
         cls._handlers.append(handler)
 
     @classmethod
-    def emit(cls, event: GameEvent, db: Session):
-        """Emituje event do wszystkich zarejestrowanych handlerów"""
-        for handler in cls._handlers:
+    def register_batch_handler(cls, handler: Callable[[list[GameEvent], Session], Any]):
+        """
+        Rejestruje handler partii eventów (np. AchievementService).
+
+        Handler nie commituje - robi to kolejka, raz na partię.
+        """
+        cls._batch_handlers.append(handler)
+
+    @classmethod
+    def dispatch(cls, events: list[GameEvent], db: Session, raise_errors: bool = False):
+        """
+        Przekazuje eventy do wszystkich zarejestrowanych handlerów.
+
+        Z ``raise_errors`` błąd handlera przerywa obsługę, żeby kolejka
+        mogła wycofać i ponowić całą partię; bez niego jest tylko logowany.
+        """
+        for batch_handler in cls._batch_handlers:
             try:
-                handler(event, db)
+                batch_handler(events, db)
             except Exception as e:
+                if raise_errors:
+                    raise
                 # Log error but don't break the flow
                 print(f"Error in event handler: {e}")
 
+        for event in events:
+            for handler in cls._handlers:
+                try:
+                    handler(event, db)
+                except Exception as e:
+                    if raise_errors:
+                        raise
+                    print(f"Error in event handler: {e}")
+
+    @classmethod
+    def emit(cls, event: GameEvent, db: Session):
+        """
+        Emituje event.
+
+        W trybie kolejki event jest tylko dodawany do kolejki, a ``db`` nie
+        jest używane. W trybie synchronicznym handlery działają od razu,
+        w sesji i transakcji wywołującego - zmiany są tylko wysyłane do
+        bazy (flush), commit należy do wywołującego.
+        """
+        if settings.event_bus_mode == "sync":
+            cls.dispatch([event], db)
+            db.flush()
+        else:
+            event_bus.publish(event)
+
     @classmethod
     def emit_puzzle_solved(cls, user_id: int, puzzle_count: int, db: Session):
         """Emituje event rozwiązania puzzla"""
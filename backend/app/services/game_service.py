@@ -3,18 +3,49 @@ from typing import Optional
 import random
 
 import chess
-from sqlalchemy.orm import Session
+import chess.polyglot
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
 from app.models import (
     User,
     GameSession,
-    GameMove,
     GameStatus,
     GameResult,
-    TimeControl,
     TIME_CONTROL_SETTINGS,
 )
-from app.schemas import GameCreate, GameMoveRequest, GameMoveResponse
+from app.schemas import GameCreate
+
+
+# A position seen this many times ends the game in a draw. Threefold is
+# where a draw can be claimed; the game is ended there, as it always was.
+REPETITION_DRAW_COUNT = 3
+
+
+def position_hash(board: chess.Board) -> int:
+    """Zobrist hash of the position, as a signed 64-bit value for BIGINT."""
+    key = chess.polyglot.zobrist_hash(board)
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+# Games start from the standard position, which has no game_moves row
+START_POSITION_HASH = position_hash(chess.Board())
+
+
+def is_rule_draw(board: chess.Board, repetitions: int) -> bool:
+    """
+    Check for a draw after a move.
+
+    ``repetitions`` is how many times the current position has occurred,
+    counted from position hashes, so no move history has to be replayed.
+    """
+    return (
+        board.is_stalemate()
+        or board.is_insufficient_material()
+        or repetitions >= REPETITION_DRAW_COUNT
+        or board.is_fifty_moves()
+    )
 
 
 class GameService:
@@ -71,13 +102,21 @@ class GameService:
         self.db.refresh(game)
         return game
 
-    def get_game_by_code(self, code: str) -> Optional[GameSession]:
-        """Get a game by its unique code."""
-        return (
-            self.db.query(GameSession)
-            .filter(GameSession.code == code)
-            .first()
-        )
+    def get_game_by_code(
+        self,
+        code: str,
+        include_moves: bool = False,
+    ) -> Optional[GameSession]:
+        """
+        Get a game by its unique code.
+
+        The move list is only loaded with ``include_moves``; the move count
+        is available either way through ``ply_count``.
+        """
+        query = self.db.query(GameSession).filter(GameSession.code == code)
+        if include_moves:
+            query = query.options(selectinload(GameSession.moves))
+        return query.first()
 
     def get_game_by_id(self, game_id: int) -> Optional[GameSession]:
         """Get a game by its ID."""
@@ -143,152 +182,6 @@ class GameService:
             self.db.commit()
             return True, "white"
 
-    def make_move(
-        self,
-        game: GameSession,
-        player: Optional[User],
-        move_request: GameMoveRequest,
-        guest_session_id: Optional[str] = None,
-        is_white_player: Optional[bool] = None,
-    ) -> GameMoveResponse:
-        """
-        Process a move in the game.
-
-        Args:
-            game: The game session
-            player: User object if logged in, None for anonymous
-            move_request: The move to make
-            guest_session_id: Session ID for anonymous players (unused but kept for future)
-            is_white_player: For anonymous players, explicitly specify color
-
-        Validates the move, updates game state, and checks for game over.
-        """
-        if game.status != GameStatus.ACTIVE.value:
-            return GameMoveResponse(
-                valid=False,
-                message="Game is not active"
-            )
-
-        # Check if it's the player's turn
-        if player:
-            is_white = game.white_player_id == player.id
-            is_black = game.black_player_id == player.id
-        else:
-            # Anonymous player - use explicit color
-            is_white = is_white_player is True
-            is_black = is_white_player is False
-
-        if not (is_white or is_black):
-            return GameMoveResponse(
-                valid=False,
-                message="You are not a player in this game"
-            )
-
-        if game.is_white_turn and not is_white:
-            return GameMoveResponse(
-                valid=False,
-                message="It's not your turn"
-            )
-
-        if not game.is_white_turn and not is_black:
-            return GameMoveResponse(
-                valid=False,
-                message="It's not your turn"
-            )
-
-        # Validate move with python-chess
-        board = chess.Board(game.current_fen)
-
-        try:
-            move = chess.Move.from_uci(move_request.move)
-        except ValueError:
-            return GameMoveResponse(
-                valid=False,
-                message="Invalid move format"
-            )
-
-        if move not in board.legal_moves:
-            return GameMoveResponse(
-                valid=False,
-                message="Illegal move"
-            )
-
-        # Get SAN notation before making the move
-        move_san = board.san(move)
-
-        # Make the move
-        board.push(move)
-        new_fen = board.fen()
-
-        # Update time
-        time_settings = TIME_CONTROL_SETTINGS[TimeControl(game.time_control)]
-        if is_white:
-            game.white_time_remaining -= move_request.time_spent // 1000
-            game.white_time_remaining += time_settings["increment"]
-            game.white_time_remaining = max(0, game.white_time_remaining)
-        else:
-            game.black_time_remaining -= move_request.time_spent // 1000
-            game.black_time_remaining += time_settings["increment"]
-            game.black_time_remaining = max(0, game.black_time_remaining)
-
-        # Record the move
-        move_number = len(game.moves) + 1
-        game_move = GameMove(
-            game_id=game.id,
-            move_number=move_number,
-            move_uci=move_request.move,
-            move_san=move_san,
-            fen_after=new_fen,
-            time_spent=move_request.time_spent,
-        )
-        self.db.add(game_move)
-
-        # Update game state
-        game.current_fen = new_fen
-        game.last_move_at = datetime.utcnow()
-
-        # Check for game over
-        game_over = False
-        result = None
-
-        if board.is_checkmate():
-            game_over = True
-            result = GameResult.WHITE_WIN if not game.is_white_turn else GameResult.BLACK_WIN
-            game.status = GameStatus.COMPLETED.value
-            game.result = result.value
-            game.ended_at = datetime.utcnow()
-
-        elif board.is_stalemate() or board.is_insufficient_material() or board.can_claim_draw():
-            game_over = True
-            result = GameResult.DRAW
-            game.status = GameStatus.COMPLETED.value
-            game.result = result.value
-            game.ended_at = datetime.utcnow()
-
-        self.db.commit()
-
-        return GameMoveResponse(
-            valid=True,
-            move_san=move_san,
-            fen_after=new_fen,
-            game_over=game_over,
-            result=result,
-        )
-
-    def timeout_game(self, game: GameSession, timed_out_color: str) -> GameResult:
-        """Handle game timeout."""
-        if timed_out_color == "white":
-            result = GameResult.BLACK_WIN
-        else:
-            result = GameResult.WHITE_WIN
-
-        game.status = GameStatus.COMPLETED.value
-        game.result = result.value
-        game.ended_at = datetime.utcnow()
-
-        self.db.commit()
-        return result
-
     def resign_game(
         self,
         game: GameSession,
@@ -313,8 +206,8 @@ class GameService:
         self.db.commit()
         return result
 
+    @staticmethod
     def get_player_color(
-        self,
         game: GameSession,
         player: Optional[User] = None,
     ) -> Optional[str]:
@@ -326,9 +219,59 @@ class GameService:
                 return "black"
         return None
 
-    def has_anonymous_player(self, game: GameSession, color: str) -> bool:
+    @staticmethod
+    def has_anonymous_player(game: GameSession, color: str) -> bool:
         """Check if a color slot is occupied by an anonymous player."""
         if color == "white":
             return game.white_guest_name is not None and game.white_player_id is None
         else:
             return game.black_guest_name is not None and game.black_player_id is None
+
+
+class AsyncGameService:
+    """
+    Asyncio variant of GameService for the WebSocket handlers.
+
+    Runs on an ``AsyncSession``, so a slow query only suspends the handler
+    that made it instead of blocking the event loop for every connection
+    of the worker. Only the reads the WebSocket path needs are here; moves
+    of active games are applied by the live game registry.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_user_by_discord_id(self, discord_id: str) -> Optional[User]:
+        """Get user by Discord ID."""
+        result = await self.db.execute(
+            select(User).where(User.discord_id == discord_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_game_by_code(
+        self,
+        code: str,
+        include_moves: bool = False,
+    ) -> Optional[GameSession]:
+        """
+        Get a game by its unique code, with its players.
+
+        Relationships can't be lazy loaded on an async session, so the
+        players (and the moves, with ``include_moves``) are loaded here.
+        The game stays usable after the session is closed.
+        """
+        stmt = (
+            select(GameSession)
+            .where(GameSession.code == code)
+            .options(
+                selectinload(GameSession.white_player),
+                selectinload(GameSession.black_player),
+            )
+        )
+        if include_moves:
+            stmt = stmt.options(selectinload(GameSession.moves))
+        result = await self.db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    get_player_color = staticmethod(GameService.get_player_color)
+    has_anonymous_player = staticmethod(GameService.has_anonymous_player)
@@ -0,0 +1,641 @@
+import math
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+
+import chess
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import (
+    GameSession,
+    GameMove,
+    GameStatus,
+    GameResult,
+    TimeControl,
+    TIME_CONTROL_SETTINGS,
+)
+from app.schemas import GameMoveResponse
+from app.services.clock_service import GameClock, monotonic_ms, timer_wheel
+from app.services.connection_manager import manager as connection_manager
+from app.services.game_service import START_POSITION_HASH, is_rule_draw, position_hash
+
+
+@dataclass
+class PendingMove:
+    """A move played in memory and not yet written to game_moves."""
+
+    move_number: int
+    move_uci: str
+    move_san: str
+    fen_after: str
+    time_spent: int
+    position_hash: int
+
+
+@dataclass
+class LiveGame:
+    """
+    Authoritative state of an active game, held in memory.
+
+    Moves are validated against ``board`` and applied here first; the
+    database catches up through ``LiveGameRegistry.flush``. The clock is
+    kept here too: it starts once both sides have made their first move,
+    and its flag deadline is scheduled on the timer wheel.
+    """
+
+    game_id: int
+    code: str
+    board: chess.Board
+    white_player_id: Optional[int]
+    black_player_id: Optional[int]
+    white_guest_name: Optional[str]
+    black_guest_name: Optional[str]
+    clock: GameClock
+    ply_count: int
+    # Occurrences of each position (by Zobrist hash) for repetition draws
+    position_counts: Counter = field(default_factory=Counter)
+    # SAN of every move, for spectator snapshots
+    san_moves: list[str] = field(default_factory=list)
+    status: str = GameStatus.ACTIVE.value
+    result: Optional[str] = None
+    last_move_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+
+    pending: list[PendingMove] = field(default_factory=list)
+    dirty: bool = False
+    touched_at: float = field(default_factory=time.monotonic)
+
+    # Guards the state above; flush_lock keeps flushes of one game in order
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    flush_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def is_white_turn(self) -> bool:
+        return self.board.turn == chess.WHITE
+
+    @property
+    def is_over(self) -> bool:
+        return self.status != GameStatus.ACTIVE.value
+
+    @property
+    def current_fen(self) -> str:
+        return self.board.fen()
+
+    @property
+    def white_time_remaining(self) -> int:
+        """White's time in whole seconds, rounded up."""
+        return math.ceil(self.clock.remaining(chess.WHITE) / 1000)
+
+    @property
+    def black_time_remaining(self) -> int:
+        """Black's time in whole seconds, rounded up."""
+        return math.ceil(self.clock.remaining(chess.BLACK) / 1000)
+
+    def clock_times(self) -> dict:
+        """Both clocks in milliseconds, for move broadcasts."""
+        now_ms = monotonic_ms()
+        return {
+            "white_time_ms": self.clock.remaining(chess.WHITE, now_ms),
+            "black_time_ms": self.clock.remaining(chess.BLACK, now_ms),
+        }
+
+    def play_move(
+        self,
+        player_id: Optional[int],
+        move_uci: str,
+        is_white_player: Optional[bool] = None,
+    ) -> GameMoveResponse:
+        """
+        Validate and apply a move in memory.
+
+        The only move path: REST and WebSocket moves both come here.
+        ``player_id`` is None for anonymous players, whose color is given
+        by ``is_white_player``. The mover is charged by the server clock,
+        not by a time reported by the client.
+        """
+        now_ms = monotonic_ms()
+        with self.lock:
+            if self.is_over:
+                return GameMoveResponse(valid=False, message="Game is not active")
+
+            if player_id is not None:
+                is_white = self.white_player_id == player_id
+                is_black = self.black_player_id == player_id
+            else:
+                is_white = is_white_player is True
+                is_black = is_white_player is False
+
+            if not (is_white or is_black):
+                return GameMoveResponse(
+                    valid=False, message="You are not a player in this game"
+                )
+
+            if (self.is_white_turn and not is_white) or (
+                not self.is_white_turn and not is_black
+            ):
+                return GameMoveResponse(valid=False, message="It's not your turn")
+
+            try:
+                move = chess.Move.from_uci(move_uci)
+            except ValueError:
+                return GameMoveResponse(valid=False, message="Invalid move format")
+
+            if move not in self.board.legal_moves:
+                return GameMoveResponse(valid=False, message="Illegal move")
+
+            # A move that arrives after the flag doesn't count; the timer
+            # wheel may just not have got to it yet
+            if self.clock.flagged(now_ms) == self.board.turn:
+                result = self._flag(self.board.turn)
+                return GameMoveResponse(
+                    valid=False, message="Time is up", game_over=True, result=result
+                )
+
+            move_san = self.board.san(move)
+            self.board.push(move)
+            new_fen = self.board.fen()
+
+            if self.clock.running is not None:
+                time_spent = self.clock.press(now_ms)
+            else:
+                time_spent = 0
+                # Clocks start after each side's first move
+                if self.ply_count + 1 >= 2:
+                    self.clock.start(self.board.turn, now_ms)
+
+            new_hash = position_hash(self.board)
+            self.position_counts[new_hash] += 1
+
+            self.ply_count += 1
+            self.san_moves.append(move_san)
+            self.pending.append(
+                PendingMove(
+                    move_number=self.ply_count,
+                    move_uci=move_uci,
+                    move_san=move_san,
+                    fen_after=new_fen,
+                    time_spent=time_spent,
+                    position_hash=new_hash,
+                )
+            )
+            self.last_move_at = datetime.utcnow()
+            self.dirty = True
+            self.touched_at = time.monotonic()
+
+            result = None
+            if self.board.is_checkmate():
+                # The side to move is mated
+                result = (
+                    GameResult.BLACK_WIN if self.is_white_turn else GameResult.WHITE_WIN
+                )
+            elif is_rule_draw(self.board, self.position_counts[new_hash]):
+                result = GameResult.DRAW
+
+            if result is not None:
+                self._finish(result)
+            else:
+                self._schedule_flag()
+
+            return GameMoveResponse(
+                valid=True,
+                move_san=move_san,
+                fen_after=new_fen,
+                game_over=result is not None,
+                result=result,
+            )
+
+    def resign(
+        self,
+        player_id: Optional[int] = None,
+        is_white_resigning: Optional[bool] = None,
+    ) -> Optional[GameResult]:
+        """Resign for a player. Returns None if the game already ended."""
+        with self.lock:
+            if self.is_over:
+                return None
+
+            if player_id is not None:
+                is_white = self.white_player_id == player_id
+            else:
+                is_white = is_white_resigning is True
+
+            result = GameResult.BLACK_WIN if is_white else GameResult.WHITE_WIN
+            self._finish(result)
+            return result
+
+    def timeout(self, timed_out_color: str) -> Optional[GameResult]:
+        """
+        Handle a client's claim that a player ran out of time.
+
+        The claim is checked against the server clock. Returns None if the
+        game already ended or the player still has time.
+        """
+        color = chess.WHITE if timed_out_color == "white" else chess.BLACK
+        with self.lock:
+            if self.is_over or self.clock.flagged() != color:
+                return None
+            return self._flag(color)
+
+    def flag(self) -> Optional[GameResult]:
+        """
+        End the game if the side to move is out of time.
+
+        Called when the timer wheel reaches the flag deadline. Returns
+        None if the game already ended or the deadline moved meanwhile,
+        in which case it is scheduled again.
+        """
+        with self.lock:
+            if self.is_over:
+                return None
+
+            color = self.clock.flagged()
+            if color is None:
+                self._schedule_flag()
+                return None
+            return self._flag(color)
+
+    def _flag(self, color: chess.Color) -> GameResult:
+        self.clock.stop()
+        if color == chess.WHITE:
+            self.clock.white_ms = 0
+            result = GameResult.BLACK_WIN
+        else:
+            self.clock.black_ms = 0
+            result = GameResult.WHITE_WIN
+
+        self._finish(result)
+        return result
+
+    def _schedule_flag(self):
+        deadline = self.clock.deadline()
+        if deadline is not None:
+            timer_wheel.schedule(self.code, deadline)
+
+    def mirror_move(
+        self,
+        move_uci: str,
+        move_san: str,
+        fen_after: str,
+        white_time_ms: int,
+        black_time_ms: int,
+    ) -> bool:
+        """
+        Apply a move accepted by another worker process.
+
+        The other process records and persists the move and runs the
+        clock; this copy only follows along. Returns False if the move
+        doesn't fit this copy's position, in which case the copy is out of
+        date.
+        """
+        with self.lock:
+            try:
+                move = chess.Move.from_uci(move_uci)
+            except ValueError:
+                return False
+
+            if move not in self.board.legal_moves:
+                return False
+
+            self.board.push(move)
+            if self.board.fen() != fen_after:
+                self.board.pop()
+                return False
+
+            self.position_counts[position_hash(self.board)] += 1
+            self.ply_count += 1
+            self.san_moves.append(move_san)
+            self.clock = GameClock(
+                white_ms=white_time_ms,
+                black_ms=black_time_ms,
+                increment_ms=self.clock.increment_ms,
+            )
+            # Keep time in case the next move is played in this process;
+            # the flag deadline belongs to the process that ran the move
+            if self.ply_count >= 2:
+                self.clock.start(self.board.turn)
+            timer_wheel.cancel(self.code)
+            self.last_move_at = datetime.utcnow()
+            self.touched_at = time.monotonic()
+            return True
+
+    def mirror_end(self, result: str):
+        """Mark the game finished by another worker process."""
+        with self.lock:
+            self.clock.stop()
+            self.status = GameStatus.COMPLETED.value
+            self.result = result
+            self.touched_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """
+        Compact state for a new spectator, followed by move broadcasts.
+
+        ``ply`` lets clients skip move messages already covered here.
+        """
+        with self.lock:
+            return {
+                "type": "snapshot",
+                "fen": self.board.fen(),
+                "white_time": self.white_time_remaining,
+                "black_time": self.black_time_remaining,
+                "is_white_turn": self.is_white_turn,
+                "moves": list(self.san_moves),
+                "ply": self.ply_count,
+                "status": self.status,
+                "result": self.result,
+            }
+
+    def _finish(self, result: GameResult):
+        self.clock.stop()
+        timer_wheel.cancel(self.code)
+        self.status = GameStatus.COMPLETED.value
+        self.result = result.value
+        self.ended_at = datetime.utcnow()
+        self.dirty = True
+        self.touched_at = time.monotonic()
+
+    def _take_changes(self) -> tuple[list[PendingMove], dict]:
+        """Hand over unwritten moves and the session row values to persist."""
+        with self.lock:
+            moves, self.pending = self.pending, []
+            self.dirty = False
+            times = self.clock_times()
+            return moves, {
+                "current_fen": self.board.fen(),
+                "ply_count": self.ply_count,
+                "white_time_remaining": math.ceil(times["white_time_ms"] / 1000),
+                "black_time_remaining": math.ceil(times["black_time_ms"] / 1000),
+                **times,
+                "last_move_at": self.last_move_at,
+                "status": self.status,
+                "result": self.result,
+                "ended_at": self.ended_at,
+            }
+
+    def _restore_changes(self, moves: list[PendingMove]):
+        """Put back moves whose write failed, so the next flush retries them."""
+        with self.lock:
+            self.pending[:0] = moves
+            self.dirty = True
+
+
+class LiveGameRegistry:
+    """
+    In-process registry of active games.
+
+    Games are loaded on first use, from the session row and its recorded
+    moves, and kept here while they are being played. Moves only touch
+    memory; the database is updated write-behind by ``flush_all`` (run
+    periodically from the app lifespan) and immediately when a game ends.
+
+    After a restart, games are recovered from the session row and the
+    position hashes in ``game_moves``, so at most the last flush interval
+    of moves can be lost.
+    """
+
+    def __init__(self, idle_timeout: float = 600.0):
+        self.idle_timeout = idle_timeout
+        self._games: Dict[str, LiveGame] = {}
+        self._lock = threading.Lock()
+
+    def get(self, code: str) -> Optional[LiveGame]:
+        """Get a game if it's held in memory."""
+        return self._games.get(code)
+
+    def get_or_load(self, db: Session, game: GameSession) -> Optional[LiveGame]:
+        """
+        Get the live state for an active game, loading it if needed.
+
+        Returns None for games that aren't active (waiting or finished).
+        """
+        live = self._games.get(game.code)
+        if live is not None:
+            return live
+
+        if game.status != GameStatus.ACTIVE.value:
+            return None
+
+        moves = db.execute(self._moves_query(game)).all()
+        return self._add(self._load(game, moves))
+
+    async def get_or_load_async(
+        self, db: AsyncSession, game: GameSession
+    ) -> Optional[LiveGame]:
+        """``get_or_load`` for async code, reading the moves on an AsyncSession."""
+        live = self._games.get(game.code)
+        if live is not None:
+            return live
+
+        if game.status != GameStatus.ACTIVE.value:
+            return None
+
+        moves = (await db.execute(self._moves_query(game))).all()
+        return self._add(self._load(game, moves))
+
+    def _add(self, loaded: LiveGame) -> LiveGame:
+        with self._lock:
+            # Another request may have loaded it meanwhile; keep the first
+            return self._games.setdefault(loaded.code, loaded)
+
+    @staticmethod
+    def _moves_query(game: GameSession):
+        return (
+            select(GameMove.move_uci, GameMove.move_san, GameMove.position_hash)
+            .where(GameMove.game_id == game.id)
+            .order_by(GameMove.move_number)
+        )
+
+    def _load(self, game: GameSession, moves: list) -> LiveGame:
+        """Rebuild the live state from the session row and its moves."""
+        position_counts = Counter([START_POSITION_HASH])
+        if all(key is not None for _, _, key in moves):
+            position_counts.update(key for _, _, key in moves)
+        else:
+            # Moves recorded before hashes were stored: replay to hash them
+            replay = chess.Board()
+            try:
+                for move_uci, _, _ in moves:
+                    replay.push_uci(move_uci)
+                    position_counts[position_hash(replay)] += 1
+            except ValueError:
+                print(f"Could not replay moves of game {game.code}")
+
+        # Repetitions are counted from hashes, so the board doesn't need
+        # the move history
+        board = chess.Board(game.current_fen)
+
+        time_settings = TIME_CONTROL_SETTINGS[TimeControl(game.time_control)]
+        clock = GameClock(
+            white_ms=(
+                game.white_time_ms
+                if game.white_time_ms is not None
+                else game.white_time_remaining * 1000
+            ),
+            black_ms=(
+                game.black_time_ms
+                if game.black_time_ms is not None
+                else game.black_time_remaining * 1000
+            ),
+            increment_ms=time_settings["increment"] * 1000,
+        )
+
+        live = LiveGame(
+            game_id=game.id,
+            code=game.code,
+            board=board,
+            white_player_id=game.white_player_id,
+            black_player_id=game.black_player_id,
+            white_guest_name=game.white_guest_name,
+            black_guest_name=game.black_guest_name,
+            clock=clock,
+            ply_count=game.ply_count,
+            position_counts=position_counts,
+            san_moves=[move_san for _, move_san, _ in moves],
+            status=game.status,
+            result=game.result,
+            last_move_at=game.last_move_at,
+        )
+        # The side to move isn't charged for time the game spent out of
+        # memory, e.g. across a restart
+        if game.ply_count >= 2:
+            clock.start(board.turn)
+            live._schedule_flag()
+        return live
+
+    def flush(self, live: LiveGame) -> bool:
+        """
+        Write a game's pending changes to the database.
+
+        Uses its own session, so it can run outside any request. Finished
+        games are dropped from the registry once written. Returns False if
+        the write failed; the changes are kept for the next attempt.
+
+        With several workers, another process may have written a later
+        state already. The session row is only updated if the stored state
+        isn't ahead of this copy, and new moves only if the stored game
+        ends right before the first of them. Otherwise nothing is written
+        and the copy, which is out of date, is dropped to be reloaded.
+        """
+        with live.flush_lock:
+            if not live.dirty:
+                self._drop_if_over(live)
+                return True
+
+            moves, values = live._take_changes()
+
+            if moves:
+                continues_stored_game = GameSession.ply_count == moves[0].move_number - 1
+            else:
+                continues_stored_game = GameSession.ply_count <= values["ply_count"]
+
+            db = SessionLocal()
+            try:
+                updated = db.execute(
+                    update(GameSession)
+                    .where(GameSession.id == live.game_id, continues_stored_game)
+                    .values(**values)
+                ).rowcount
+                if updated:
+                    db.add_all(
+                        GameMove(
+                            game_id=live.game_id,
+                            move_number=move.move_number,
+                            move_uci=move.move_uci,
+                            move_san=move.move_san,
+                            fen_after=move.fen_after,
+                            time_spent=move.time_spent,
+                            position_hash=move.position_hash,
+                        )
+                        for move in moves
+                    )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                live._restore_changes(moves)
+                print(f"Failed to persist game {live.code}: {e}")
+                return False
+            finally:
+                db.close()
+
+            if not updated:
+                print(f"Game {live.code} is ahead in the database; dropped the stale copy")
+                self.discard(live)
+                return True
+
+            self._drop_if_over(live)
+            return True
+
+    def apply_remote(self, game_code: str, message: dict):
+        """
+        Follow moves and results broadcast by other worker processes.
+
+        A copy that can't follow is dropped and reloaded from the database
+        on next use.
+        """
+        live = self._games.get(game_code)
+        if live is None:
+            return
+
+        msg_type = message.get("type")
+        if msg_type == "move":
+            if not live.mirror_move(
+                message["move_uci"],
+                message["move_san"],
+                message["fen"],
+                message.get("white_time_ms", message["white_time"] * 1000),
+                message.get("black_time_ms", message["black_time"] * 1000),
+            ):
+                self.discard(live)
+        elif msg_type == "game_over":
+            live.mirror_end(message["result"])
+            if not live.dirty:
+                self.discard(live)
+
+    def discard(self, live: LiveGame):
+        """Forget a game without writing it, unless it has unwritten changes."""
+        with self._lock:
+            if self._games.get(live.code) is live and not live.dirty:
+                del self._games[live.code]
+                timer_wheel.cancel(live.code)
+
+    def flush_all(self):
+        """
+        Flush every dirty game and forget games idle for too long.
+
+        Idle games with a running clock are kept while this process has
+        connections in the room, since its timer wheel flags them. Games
+        loaded only for REST requests are forgotten either way and
+        reloaded on next use.
+        """
+        now = time.monotonic()
+        for live in list(self._games.values()):
+            if live.dirty or live.is_over:
+                self.flush(live)
+            elif now - live.touched_at > self.idle_timeout and (
+                live.clock.running is None
+                or live.code not in connection_manager.active_connections
+            ):
+                self.discard(live)
+
+    def codes(self) -> set[str]:
+        """Codes of the games held in memory."""
+        return set(self._games)
+
+    def _drop_if_over(self, live: LiveGame):
+        if live.is_over:
+            self.discard(live)
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+
+# Global live game registry
+live_games = LiveGameRegistry(idle_timeout=settings.live_game_idle_timeout)
+connection_manager.add_remote_handler(live_games.apply_remote)
@@ -0,0 +1,140 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import chess
+
+from app.config import settings
+from app.enums import BotDifficulty
+
+
+@dataclass
+class _Entry:
+    moves: list[str] = field(default_factory=list)
+    expires_at: float = 0.0
+
+
+class BestMoveCache:
+    """
+    Bounded LRU/TTL cache of bot moves keyed by position and difficulty.
+
+    Positions are keyed by EPD (FEN without the move counters), so the same
+    position reached at a different move number shares an entry. Each entry
+    collects several engine answers before it starts serving hits, and a hit
+    picks one of them at random, so weaker bots keep varying their play.
+    """
+
+    def __init__(self, max_entries: int = 50000, ttl: float = 86400.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries: OrderedDict[tuple[str, BotDifficulty], _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(
+        self,
+        board: chess.Board,
+        difficulty: BotDifficulty,
+        samples: int = 1,
+    ) -> Optional[str]:
+        """
+        Get a cached move for the position.
+
+        Returns None until at least ``samples`` engine moves have been
+        recorded for the entry.
+        """
+        if not self.enabled:
+            return None
+
+        key = (board.epd(), difficulty)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                entry = None
+
+            if entry is None or len(entry.moves) < samples:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return random.choice(entry.moves)
+
+    def put(
+        self,
+        board: chess.Board,
+        difficulty: BotDifficulty,
+        move: str,
+        samples: int = 1,
+    ):
+        """Record an engine move for the position, keeping at most ``samples``."""
+        if not self.enabled:
+            return
+
+        key = (board.epd(), difficulty)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                entry = _Entry(expires_at=time.monotonic() + self.ttl)
+                self._entries[key] = entry
+
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+
+            if len(entry.moves) < samples:
+                entry.moves.append(move)
+            self._entries.move_to_end(key)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit-rate and size stats."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+# Global instance shared by the sync and async Stockfish services
+_move_cache: Optional[BestMoveCache] = None
+
+
+def get_move_cache() -> BestMoveCache:
+    """Get the global best-move cache."""
+    global _move_cache
+    if _move_cache is None:
+        _move_cache = BestMoveCache(
+            max_entries=settings.bot_move_cache_size,
+            ttl=settings.bot_move_cache_ttl,
+        )
+    return _move_cache
@@ -0,0 +1,87 @@
+import threading
+from typing import Optional
+
+import chess
+import chess.polyglot
+
+from app.config import settings
+
+
+class OpeningBook:
+    """
+    Polyglot opening book used for the bot's first plies.
+
+    The ``.bin`` file is memory-mapped on first use, so a lookup is a
+    binary search over the mapped file rather than an engine search.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._reader: Optional[chess.polyglot.MemoryMappedReader] = None
+        self._lock = threading.Lock()
+        self._unavailable = not path
+
+        self._hits = 0
+        self._misses = 0
+
+    def _get_reader(self) -> Optional[chess.polyglot.MemoryMappedReader]:
+        """Open the book lazily. A missing or broken book disables it."""
+        if self._reader is None and not self._unavailable:
+            with self._lock:
+                if self._reader is None and not self._unavailable:
+                    try:
+                        self._reader = chess.polyglot.open_reader(self.path)
+                    except Exception as e:
+                        print(f"Opening book not available: {e}")
+                        self._unavailable = True
+        return self._reader
+
+    def choose_move(self, board: chess.Board, max_plies: int) -> Optional[chess.Move]:
+        """
+        Pick a weighted book move for the position.
+
+        Returns None past ``max_plies`` or when the book has no entry, in
+        which case the caller falls back to the engine.
+        """
+        if board.ply() >= max_plies:
+            return None
+
+        reader = self._get_reader()
+        if reader is None:
+            return None
+
+        try:
+            move = reader.weighted_choice(board).move
+        except IndexError:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        return move
+
+    def close(self):
+        """Unmap the book file."""
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def stats(self) -> dict:
+        """Book usage stats."""
+        return {
+            "enabled": not self._unavailable,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+
+# Global instance (lazy initialization)
+_opening_book: Optional[OpeningBook] = None
+
+
+def get_opening_book() -> OpeningBook:
+    """Get the global opening book instance."""
+    global _opening_book
+    if _opening_book is None:
+        _opening_book = OpeningBook(settings.opening_book_path)
+    return _opening_book
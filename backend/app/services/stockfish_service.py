@@ -1,77 +1,184 @@
-import asyncio
-from typing import Optional
+from typing import Mapping, Optional
 import chess
 import chess.engine
 
+from app.config import settings as app_settings
 from app.enums import BotDifficulty
+from app.services.engine_pool import AsyncEnginePool, EnginePool, resolve_pool_size, split_pool_size
+from app.services.move_cache import BestMoveCache, get_move_cache
+from app.services.tablebase import EndgameTablebase, get_tablebase
 
 
 # Stockfish settings for each difficulty level
+# cache_samples: engine answers collected per position before the
+# move cache serves hits, so weaker bots stay varied
+# book_plies: how deep into the game the bot may play opening book moves
 DIFFICULTY_SETTINGS = {
     BotDifficulty.BEGINNER: {
         "skill_level": 1,
         "elo": 800,
         "time_limit": 0.1,
         "depth": 5,
+        "cache_samples": 6,
+        "book_plies": 4,
     },
     BotDifficulty.EASY: {
         "skill_level": 5,
         "elo": 1000,
         "time_limit": 0.2,
         "depth": 8,
+        "cache_samples": 5,
+        "book_plies": 6,
     },
     BotDifficulty.MEDIUM: {
         "skill_level": 10,
         "elo": 1400,
         "time_limit": 0.3,
         "depth": 12,
+        "cache_samples": 4,
+        "book_plies": 10,
     },
     BotDifficulty.HARD: {
         "skill_level": 15,
         "elo": 1800,
         "time_limit": 0.5,
         "depth": 15,
+        "cache_samples": 3,
+        "book_plies": 12,
     },
     BotDifficulty.EXPERT: {
         "skill_level": 18,
         "elo": 2200,
         "time_limit": 1.0,
         "depth": 18,
+        "cache_samples": 2,
+        "book_plies": 16,
     },
     BotDifficulty.MASTER: {
         "skill_level": 20,
         "elo": 2800,
         "time_limit": 2.0,
         "depth": 20,
+        "cache_samples": 1,
+        "book_plies": 20,
     },
 }
 
 
+# Full-strength options used for position analysis
+ANALYSIS_PROFILE = "analysis"
+
+
+def _accepts(option: chess.engine.Option, value) -> bool:
+    """Check whether an engine option accepts the given value."""
+    try:
+        option.parse(value)
+        return True
+    except chess.engine.EngineError:
+        return False
+
+
+def _difficulty_options(settings: dict):
+    """Build the options factory for a difficulty level."""
+
+    def options_for(available: Mapping[str, chess.engine.Option]) -> dict:
+        options = {}
+        if "Skill Level" in available:
+            options["Skill Level"] = settings["skill_level"]
+
+        # Limit strength only if the engine accepts this Elo; otherwise turn
+        # it off so a previous difficulty's Elo doesn't stay in effect
+        if "UCI_LimitStrength" in available:
+            elo_option = available.get("UCI_Elo")
+            limit = elo_option is not None and _accepts(elo_option, settings["elo"])
+            options["UCI_LimitStrength"] = limit
+            if limit:
+                options["UCI_Elo"] = settings["elo"]
+
+        return options
+
+    return options_for
+
+
+def _analysis_options(available: Mapping[str, chess.engine.Option]) -> dict:
+    """Options for full-strength analysis."""
+    options = {}
+    if "Skill Level" in available:
+        options["Skill Level"] = available["Skill Level"].max or 20
+    if "UCI_LimitStrength" in available:
+        options["UCI_LimitStrength"] = False
+    return options
+
+
+def _plays_varied(difficulty: BotDifficulty) -> bool:
+    """Weak bots pick among equally good tablebase moves at random."""
+    return difficulty in (BotDifficulty.BEGINNER, BotDifficulty.EASY)
+
+
+def _search_limit(settings: dict) -> chess.engine.Limit:
+    """Search limit for a difficulty level."""
+    return chess.engine.Limit(
+        time=settings["time_limit"],
+        depth=settings["depth"],
+    )
+
+
+def _format_analysis(info: dict, depth: int) -> dict:
+    """Convert engine analysis info to the API representation."""
+    score = info.get("score")
+    pv = info.get("pv", [])
+
+    # Convert score to centipawns or mate
+    if score:
+        if score.is_mate():
+            score_value = f"M{score.relative.mate()}"
+        else:
+            score_value = score.relative.score()
+    else:
+        score_value = 0
+
+    return {
+        "score": score_value,
+        "best_line": [move.uci() for move in pv[:5]],
+        "depth": info.get("depth", depth),
+    }
+
+
 class StockfishService:
     """
     Service for interacting with Stockfish chess engine.
 
-    Uses python-chess's engine interface for communication.
+    Uses python-chess's engine interface for communication. Searches are
+    spread over a pool of engine processes so concurrent bot games don't
+    queue behind a single engine.
     """
 
-    def __init__(self, stockfish_path: str = "stockfish"):
+    def __init__(
+        self,
+        stockfish_path: str = "stockfish",
+        pool_size: int = 1,
+        max_waiters: int = 64,
+        checkout_timeout: float = 10.0,
+        move_cache: Optional[BestMoveCache] = None,
+        tablebase: Optional[EndgameTablebase] = None,
+    ):
         self.stockfish_path = stockfish_path
-        self._engine: Optional[chess.engine.SimpleEngine] = None
-
-    def _get_engine(self) -> chess.engine.SimpleEngine:
-        """Get or create engine instance."""
-        if self._engine is None:
-            try:
-                self._engine = chess.engine.SimpleEngine.popen_uci(self.stockfish_path)
-            except Exception as e:
-                raise RuntimeError(f"Failed to start Stockfish: {e}")
-        return self._engine
+        self.move_cache = move_cache or BestMoveCache(max_entries=0)
+        self.tablebase = tablebase or EndgameTablebase("")
+        self._pool = EnginePool(
+            stockfish_path,
+            size=pool_size,
+            max_waiters=max_waiters,
+            checkout_timeout=checkout_timeout,
+        )
 
     def close(self):
-        """Close the engine."""
-        if self._engine:
-            self._engine.quit()
-            self._engine = None
+        """Close all engines."""
+        self._pool.close()
+
+    def stats(self) -> dict:
+        """Get engine pool usage stats."""
+        return self._pool.stats()
 
     def get_best_move(
         self,
@@ -88,39 +195,34 @@ class StockfishService:
         Returns:
             The best move in UCI notation (e.g., "e2e4")
         """
-        engine = self._get_engine()
         board = chess.Board(fen)
 
         settings = DIFFICULTY_SETTINGS[difficulty]
+        samples = settings["cache_samples"]
 
-        # Configure engine for difficulty
-        engine.configure({
-            "Skill Level": settings["skill_level"],
-        })
+        # Endgames covered by the tablebases need no search
+        tablebase_move = self.tablebase.best_move(board, varied=_plays_varied(difficulty))
+        if tablebase_move:
+            return tablebase_move.uci()
 
-        # Try to set UCI_LimitStrength and UCI_Elo if supported
-        try:
-            engine.configure({
-                "UCI_LimitStrength": True,
-                "UCI_Elo": settings["elo"],
-            })
-        except chess.engine.EngineError:
-            # Engine might not support these options
-            pass
-
-        # Get the best move
-        result = engine.play(
-            board,
-            chess.engine.Limit(
-                time=settings["time_limit"],
-                depth=settings["depth"],
-            ),
-        )
+        cached = self.move_cache.get(board, difficulty, samples)
+        if cached:
+            return cached
+
+        # Engines remember their options, so they're only sent when the
+        # engine was last used for a different difficulty
+        with self._pool.checkout(
+            profile=difficulty,
+            options_for=_difficulty_options(settings),
+        ) as engine:
+            result = engine.play(board, _search_limit(settings))
 
         if result.move is None:
             raise RuntimeError("Engine returned no move")
 
-        return result.move.uci()
+        move = result.move.uci()
+        self.move_cache.put(board, difficulty, move, samples)
+        return move
 
     def analyze_position(
         self,
@@ -137,45 +239,163 @@ class StockfishService:
         Returns:
             Dictionary with score and best line
         """
-        engine = self._get_engine()
         board = chess.Board(fen)
 
-        info = engine.analyse(board, chess.engine.Limit(depth=depth))
+        tablebase_analysis = self.tablebase.analyse(board)
+        if tablebase_analysis:
+            return tablebase_analysis
 
-        score = info.get("score")
-        pv = info.get("pv", [])
-
-        # Convert score to centipawns or mate
-        if score:
-            if score.is_mate():
-                score_value = f"M{score.relative.mate()}"
-            else:
-                score_value = score.relative.score()
-        else:
-            score_value = 0
+        with self._pool.checkout(
+            profile=ANALYSIS_PROFILE,
+            options_for=_analysis_options,
+        ) as engine:
+            info = engine.analyse(board, chess.engine.Limit(depth=depth))
 
-        return {
-            "score": score_value,
-            "best_line": [move.uci() for move in pv[:5]],
-            "depth": info.get("depth", depth),
-        }
+        return _format_analysis(info, depth)
 
     def is_available(self) -> bool:
         """Check if Stockfish is available."""
         try:
-            engine = self._get_engine()
-            return engine is not None
+            with self._pool.checkout() as engine:
+                return engine is not None
+        except Exception:
+            return False
+
+
+class AsyncStockfishService:
+    """
+    Asyncio variant of StockfishService.
+
+    Talks to the engines through python-chess's coroutine API, so async
+    routes can await a search without tying up a threadpool worker.
+    """
+
+    def __init__(
+        self,
+        stockfish_path: str = "stockfish",
+        pool_size: int = 1,
+        max_waiters: int = 64,
+        checkout_timeout: float = 10.0,
+        move_cache: Optional[BestMoveCache] = None,
+        tablebase: Optional[EndgameTablebase] = None,
+    ):
+        self.stockfish_path = stockfish_path
+        self.move_cache = move_cache or BestMoveCache(max_entries=0)
+        self.tablebase = tablebase or EndgameTablebase("")
+        self._pool = AsyncEnginePool(
+            stockfish_path,
+            size=pool_size,
+            max_waiters=max_waiters,
+            checkout_timeout=checkout_timeout,
+        )
+
+    async def close(self):
+        """Close all engines."""
+        await self._pool.close()
+
+    def stats(self) -> dict:
+        """Get engine pool usage stats."""
+        return self._pool.stats()
+
+    async def get_best_move(
+        self,
+        fen: str,
+        difficulty: BotDifficulty = BotDifficulty.MEDIUM,
+    ) -> str:
+        """Get the best move for the given position at the specified difficulty."""
+        board = chess.Board(fen)
+
+        settings = DIFFICULTY_SETTINGS[difficulty]
+        samples = settings["cache_samples"]
+
+        # Endgames covered by the tablebases need no search
+        tablebase_move = self.tablebase.best_move(board, varied=_plays_varied(difficulty))
+        if tablebase_move:
+            return tablebase_move.uci()
+
+        cached = self.move_cache.get(board, difficulty, samples)
+        if cached:
+            return cached
+
+        async with self._pool.checkout(
+            profile=difficulty,
+            options_for=_difficulty_options(settings),
+        ) as engine:
+            result = await engine.play(board, _search_limit(settings))
+
+        if result.move is None:
+            raise RuntimeError("Engine returned no move")
+
+        move = result.move.uci()
+        self.move_cache.put(board, difficulty, move, samples)
+        return move
+
+    async def analyze_position(
+        self,
+        fen: str,
+        depth: int = 15,
+    ) -> dict:
+        """Analyze a position and return evaluation."""
+        board = chess.Board(fen)
+
+        tablebase_analysis = self.tablebase.analyse(board)
+        if tablebase_analysis:
+            return tablebase_analysis
+
+        async with self._pool.checkout(
+            profile=ANALYSIS_PROFILE,
+            options_for=_analysis_options,
+        ) as engine:
+            info = await engine.analyse(board, chess.engine.Limit(depth=depth))
+
+        return _format_analysis(info, depth)
+
+    async def is_available(self) -> bool:
+        """Check if Stockfish is available."""
+        try:
+            async with self._pool.checkout() as engine:
+                return engine is not None
         except Exception:
             return False
 
 
-# Global instance (lazy initialization)
+# Global instances (lazy initialization)
 _stockfish_service: Optional[StockfishService] = None
+_async_stockfish_service: Optional[AsyncStockfishService] = None
+
+
+def _service_options(pool_size: int) -> dict:
+    return {
+        "pool_size": pool_size,
+        "max_waiters": app_settings.stockfish_pool_max_waiters,
+        "checkout_timeout": app_settings.stockfish_pool_timeout,
+        "move_cache": get_move_cache(),
+        "tablebase": get_tablebase(),
+    }
+
+
+def _pool_sizes() -> tuple[int, int]:
+    """(sync, async) pool sizes; STOCKFISH_POOL_SIZE is the total for both."""
+    return split_pool_size(resolve_pool_size(app_settings.stockfish_pool_size))
 
 
 def get_stockfish_service() -> StockfishService:
     """Get the global Stockfish service instance."""
     global _stockfish_service
     if _stockfish_service is None:
-        _stockfish_service = StockfishService()
+        sync_size, _ = _pool_sizes()
+        _stockfish_service = StockfishService(
+            app_settings.stockfish_path, **_service_options(sync_size)
+        )
     return _stockfish_service
+
+
+def get_async_stockfish_service() -> AsyncStockfishService:
+    """Get the global async Stockfish service instance."""
+    global _async_stockfish_service
+    if _async_stockfish_service is None:
+        _, async_size = _pool_sizes()
+        _async_stockfish_service = AsyncStockfishService(
+            app_settings.stockfish_path, **_service_options(async_size)
+        )
+    return _async_stockfish_service
@@ -0,0 +1,215 @@
+import functools
+import random
+import threading
+from typing import Optional
+
+import chess
+import chess.syzygy
+
+from app.config import settings
+
+
+# Centipawn score reported for tablebase wins, minus the distance to zeroing
+TABLEBASE_WIN_SCORE = 20000
+
+
+def apply_fifty_move_rule(wdl: int, dtz: int, halfmove_clock: int) -> int:
+    """
+    WDL for a position with the given halfmove clock.
+
+    Tablebase WDL assumes a fresh clock. A win that can't reach a zeroing
+    move before the fifty-move rule is a cursed win (1), and the matching
+    loss a blessed loss (-1).
+    """
+    if abs(wdl) == 2 and abs(dtz) + halfmove_clock > 100:
+        return wdl // 2
+    return wdl
+
+
+class EndgameTablebase:
+    """
+    Local Syzygy tablebases for positions with few pieces.
+
+    WDL/DTZ probes answer covered endgames exactly and instantly, so the
+    bot and analysis can skip the engine search for them. Probe results
+    are cached in-process, keyed by position without the move counters
+    (WDL and DTZ don't depend on them); the halfmove clock is applied to
+    each result afterwards.
+
+    python-chess guards its lazily opened table files with its own locks
+    and the probes only read memory-mapped files, so probes don't take
+    ``_lock``; it only covers opening and closing the tablebases.
+    """
+
+    def __init__(self, directory: str, cache_size: int = 100000):
+        self.directory = directory
+        self.max_pieces = 0
+
+        self._tablebase: Optional[chess.syzygy.Tablebase] = None
+        self._lock = threading.Lock()
+        self._unavailable = not directory
+
+        self._probe_cached = functools.lru_cache(maxsize=cache_size)(self._probe_epd)
+
+    def _get_tablebase(self) -> Optional[chess.syzygy.Tablebase]:
+        """Open the tablebases lazily. A missing directory disables probing."""
+        if self._tablebase is None and not self._unavailable:
+            with self._lock:
+                if self._tablebase is None and not self._unavailable:
+                    try:
+                        tablebase = chess.syzygy.open_tablebase(self.directory)
+                    except Exception as e:
+                        print(f"Syzygy tablebases not available: {e}")
+                        self._unavailable = True
+                        return None
+
+                    # Table names look like "KQvK": one letter per piece
+                    self.max_pieces = max(
+                        (len(name) - 1 for name in tablebase.wdl), default=0
+                    )
+                    self._tablebase = tablebase
+        return self._tablebase
+
+    def covers(self, board: chess.Board) -> bool:
+        """Check whether the position can be probed."""
+        if self._get_tablebase() is None:
+            return False
+        return (
+            not board.castling_rights
+            and chess.popcount(board.occupied) <= self.max_pieces
+        )
+
+    def probe(self, board: chess.Board) -> Optional[tuple[int, int]]:
+        """
+        Probe WDL and DTZ for the side to move.
+
+        The WDL accounts for the board's halfmove clock, so a win that the
+        fifty-move rule turns into a draw is reported as a cursed win.
+        Returns None when the position isn't covered by the tablebases.
+        """
+        if not self.covers(board):
+            return None
+
+        result = self._probe_cached(board.epd())
+        if result is None:
+            return None
+
+        wdl, dtz = result
+        return apply_fifty_move_rule(wdl, dtz, board.halfmove_clock), dtz
+
+    def _probe_epd(self, epd: str) -> Optional[tuple[int, int]]:
+        tablebase = self._tablebase
+        if tablebase is None:
+            return None
+
+        board = chess.Board(f"{epd} 0 1")
+        wdl = tablebase.get_wdl(board)
+        dtz = tablebase.get_dtz(board)
+
+        if wdl is None or dtz is None:
+            return None
+        return wdl, dtz
+
+    def best_move(self, board: chess.Board, varied: bool = False) -> Optional[chess.Move]:
+        """
+        Pick the tablebase-best move for the side to move.
+
+        Wins are converted by the shortest distance to zeroing, losses are
+        dragged out. With ``varied``, any move keeping the best result is
+        picked at random, so weaker bots don't play like a tablebase.
+        """
+        if not self.covers(board):
+            return None
+
+        ranked = []
+        for move in board.legal_moves:
+            board.push(move)
+            try:
+                if board.is_checkmate():
+                    return move
+                result = self.probe(board)
+            finally:
+                board.pop()
+
+            if result is None:
+                return None
+
+            # Probe is from the opponent's point of view
+            wdl, dtz = -result[0], result[1]
+            if wdl > 0:
+                tiebreak = (board.is_zeroing(move), -abs(dtz))
+            elif wdl < 0:
+                tiebreak = (False, abs(dtz))
+            else:
+                tiebreak = (False, 0)
+            ranked.append(((wdl, tiebreak), move))
+
+        if not ranked:
+            return None
+
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        best_wdl = ranked[0][0][0]
+
+        if varied:
+            return random.choice([move for key, move in ranked if key[0] == best_wdl])
+        return ranked[0][1]
+
+    def analyse(self, board: chess.Board) -> Optional[dict]:
+        """Tablebase evaluation in the same shape as engine analysis."""
+        result = self.probe(board)
+        if result is None:
+            return None
+
+        wdl, dtz = result
+        best = self.best_move(board)
+
+        # Cursed wins and blessed losses are draws under the fifty-move rule
+        if wdl == 2:
+            score = TABLEBASE_WIN_SCORE - abs(dtz)
+        elif wdl == -2:
+            score = -TABLEBASE_WIN_SCORE + abs(dtz)
+        else:
+            score = 0
+
+        return {
+            "score": score,
+            "best_line": [best.uci()] if best else [],
+            "depth": 0,
+            "tablebase": {"wdl": wdl, "dtz": dtz},
+        }
+
+    def close(self):
+        """Close the tablebase files."""
+        with self._lock:
+            if self._tablebase is not None:
+                self._tablebase.close()
+                self._tablebase = None
+        self._probe_cached.cache_clear()
+
+    def stats(self) -> dict:
+        """Probe cache stats."""
+        info = self._probe_cached.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "enabled": not self._unavailable,
+            "max_pieces": self.max_pieces,
+            "cache_size": info.currsize,
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global instance (lazy initialization)
+_tablebase: Optional[EndgameTablebase] = None
+
+
+def get_tablebase() -> EndgameTablebase:
+    """Get the global tablebase instance."""
+    global _tablebase
+    if _tablebase is None:
+        _tablebase = EndgameTablebase(
+            settings.syzygy_path,
+            cache_size=settings.syzygy_cache_size,
+        )
+    return _tablebase
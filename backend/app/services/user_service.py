@@ -115,9 +115,8 @@ class UserService:
             if user.current_streak > user.best_streak:
                 user.best_streak = user.current_streak
 
-            self.db.commit()
-
-            # Emit events for achievements
+            # Emit events for achievements (in sync mode, unlocks are
+            # committed together with the progress below)
             EventService.emit_puzzle_solved(
                 user_id=user.id,
                 puzzle_count=user.puzzles_solved,
@@ -129,6 +128,8 @@ class UserService:
                 streak_days=user.current_streak,
                 db=self.db
             )
+
+            self.db.commit()
         else:
             self.db.commit()
 
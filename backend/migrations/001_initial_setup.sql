@@ -107,11 +107,15 @@ CREATE TABLE game_sessions (
     status VARCHAR(20) DEFAULT 'waiting',
     result VARCHAR(20),
     current_fen VARCHAR(100) DEFAULT 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    ply_count INTEGER NOT NULL DEFAULT 0,
 
     -- Time control
     time_control VARCHAR(20) DEFAULT 'blitz_5',
     white_time_remaining INTEGER DEFAULT 300,
     black_time_remaining INTEGER DEFAULT 300,
+    -- Server clocks in milliseconds (NULL: use the seconds columns)
+    white_time_ms INTEGER,
+    black_time_ms INTEGER,
 
     -- Timestamps
     created_at TIMESTAMPTZ DEFAULT NOW(),
@@ -134,9 +138,12 @@ CREATE TABLE game_moves (
     move_san VARCHAR(10) NOT NULL,
     fen_after VARCHAR(100) NOT NULL,
     time_spent INTEGER DEFAULT 0,  -- milliseconds
+    position_hash BIGINT,  -- Zobrist hash of the position after the move
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+CREATE INDEX ix_game_moves_game_id_position_hash ON game_moves(game_id, position_hash);
+
 -- =====================================================
 -- BOT GAMES TABLE
 -- =====================================================
@@ -156,6 +163,8 @@ CREATE TABLE bot_games (
 
     -- Move history (space-separated UCI moves)
     moves TEXT DEFAULT '',
+    -- Same moves in SAN, for PGN export
+    san_moves TEXT NOT NULL DEFAULT '',
 
     -- PGN
     pgn TEXT,
@@ -0,0 +1,9 @@
+-- =====================================================
+-- Migration 003: Add SAN move history to bot games
+-- Run this script to store SAN movetext next to UCI moves
+-- =====================================================
+
+-- SAN moves (space-separated), kept in step with the UCI moves column.
+-- PGN export concatenates headers with this instead of replaying the game.
+-- Existing games keep an empty value and fall back to replaying moves.
+ALTER TABLE bot_games ADD COLUMN IF NOT EXISTS san_moves TEXT NOT NULL DEFAULT '';
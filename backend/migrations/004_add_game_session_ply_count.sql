@@ -0,0 +1,15 @@
+-- =====================================================
+-- Migration 004: Add ply counter to game sessions
+-- Run this script to store the move count on the game itself
+-- =====================================================
+
+-- Plies played, incremented together with each inserted game_moves row.
+-- Reading the move count no longer loads every move of the game.
+ALTER TABLE game_sessions ADD COLUMN IF NOT EXISTS ply_count INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill from the moves already recorded
+UPDATE game_sessions
+SET ply_count = (
+    SELECT COUNT(*) FROM game_moves
+    WHERE game_moves.game_id = game_sessions.id
+);
@@ -0,0 +1,12 @@
+-- =====================================================
+-- Migration 005: Add position hashes to game moves
+-- Run this script to store a Zobrist hash with each move
+-- =====================================================
+
+-- Zobrist hash (signed 64-bit) of the position after the move.
+-- Repetition draws are detected by counting hashes instead of replaying games.
+-- Existing moves keep NULL and are hashed by replay when a game is loaded.
+ALTER TABLE game_moves ADD COLUMN IF NOT EXISTS position_hash BIGINT;
+
+CREATE INDEX IF NOT EXISTS ix_game_moves_game_id_position_hash
+    ON game_moves(game_id, position_hash);
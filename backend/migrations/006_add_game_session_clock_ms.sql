@@ -0,0 +1,10 @@
+-- =====================================================
+-- Migration 006: Add millisecond clocks to game sessions
+-- Run this script to store the server clocks with full precision
+-- =====================================================
+
+-- Remaining time in milliseconds, written by the server-side clock.
+-- white_time_remaining/black_time_remaining (seconds) stay for the API.
+-- Existing games keep NULL and fall back to the seconds columns.
+ALTER TABLE game_sessions ADD COLUMN IF NOT EXISTS white_time_ms INTEGER;
+ALTER TABLE game_sessions ADD COLUMN IF NOT EXISTS black_time_ms INTEGER;
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Script to unlock achievements that users already qualify for.
+
+Achievements are normally unlocked by events, so users who already met the
+threshold of a newly added achievement only get it on their next matching
+event. This recomputes unlocks for every user from the stats kept on
+the users table, with one set-based INSERT ... SELECT per chunk of users:
+
+- PUZZLE_SOLVED     -> users.puzzles_solved
+- LESSON_COMPLETED  -> users.lessons_completed
+- GAME_WON          -> users.games_won
+- STREAK_DAY        -> users.best_streak
+
+Other event types (checkmates, completed lesson categories) aren't derived
+from user stats and are skipped. Existing unlocks are left alone
+(ON CONFLICT DO NOTHING), so the script can be run any number of times.
+Running servers pick the new rows up on their own: a stale cache entry only
+costs an insert that the database skips.
+
+Usage:
+    # Recompute all active achievements
+    python scripts/backfill_achievements.py
+
+    # Only newly added achievements, in bigger chunks
+    python scripts/backfill_achievements.py --achievement PUZZLES_500 --chunk-size 50000
+
+    # Count what would be unlocked without writing
+    python scripts/backfill_achievements.py --dry-run
+
+Environment:
+    DATABASE_URL - PostgreSQL connection string
+"""
+
+import os
+import sys
+import time
+import argparse
+
+from sqlalchemy import create_engine, select, func, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.user import User
+from app.models.achievement import Achievement, UserAchievement
+
+
+# Event type -> user stat that holds its running value
+EVENT_STATS = {
+    "PUZZLE_SOLVED": User.puzzles_solved,
+    "LESSON_COMPLETED": User.lessons_completed,
+    "GAME_WON": User.games_won,
+    "STREAK_DAY": User.best_streak,
+}
+
+
+def get_database_url():
+    """Get database URL from environment."""
+    url = os.environ.get("DATABASE_URL")
+    if not url:
+        raise ValueError("DATABASE_URL environment variable not set")
+    return url
+
+
+def qualifying_pairs(achievement_ids: list[int], low: int, high: int):
+    """(user_id, achievement_id) for users in (low, high] that meet a threshold."""
+    reached = or_(*(
+        and_(Achievement.event_type == event_type, stat >= Achievement.threshold)
+        for event_type, stat in EVENT_STATS.items()
+    ))
+    return (
+        select(User.id.label("user_id"), Achievement.id.label("achievement_id"))
+        .join(Achievement, reached)
+        .where(
+            User.id > low,
+            User.id <= high,
+            Achievement.id.in_(achievement_ids),
+        )
+    )
+
+
+def backfill_chunk(session, achievement_ids: list[int], low: int, high: int) -> int:
+    """Insert the missing unlocks of one chunk of users. Returns rows inserted."""
+    pairs = qualifying_pairs(achievement_ids, low, high)
+    insert = postgresql.insert if session.bind.dialect.name == "postgresql" else sqlite.insert
+    stmt = (
+        insert(UserAchievement)
+        .from_select(["user_id", "achievement_id"], pairs)
+        .on_conflict_do_nothing(index_elements=["user_id", "achievement_id"])
+    )
+    result = session.execute(stmt)
+    session.commit()
+    return result.rowcount
+
+
+def count_chunk(session, achievement_ids: list[int], low: int, high: int) -> int:
+    """Count the unlocks one chunk of users is missing."""
+    pairs = qualifying_pairs(achievement_ids, low, high).subquery()
+    missing = (
+        select(func.count())
+        .select_from(pairs)
+        .where(~select(UserAchievement.id).where(
+            UserAchievement.user_id == pairs.c.user_id,
+            UserAchievement.achievement_id == pairs.c.achievement_id,
+        ).exists())
+    )
+    return session.execute(missing).scalar()
+
+
+def run(session, codes: list[str], chunk_size: int, dry_run: bool):
+    query = select(Achievement.id, Achievement.code, Achievement.event_type).where(
+        Achievement.is_active == True
+    )
+    if codes:
+        query = query.where(Achievement.code.in_(codes))
+    achievements = session.execute(query).all()
+
+    supported = [a for a in achievements if a.event_type in EVENT_STATS]
+    skipped = [a.code for a in achievements if a.event_type not in EVENT_STATS]
+    if skipped:
+        print(f"Skipping achievements not derived from user stats: {', '.join(skipped)}")
+    if not supported:
+        print("No achievements to backfill")
+        return
+
+    achievement_ids = [a.id for a in supported]
+    first_id, last_id = session.execute(select(func.min(User.id), func.max(User.id))).one()
+    if first_id is None:
+        print("No users")
+        return
+
+    print(f"Backfilling {len(supported)} achievements for users {first_id}..{last_id}")
+
+    started = time.perf_counter()
+    total = 0
+    # Chunks are id ranges, so each one is an index range scan
+    for low in range(first_id - 1, last_id, chunk_size):
+        high = low + chunk_size
+        if dry_run:
+            total += count_chunk(session, achievement_ids, low, high)
+        else:
+            total += backfill_chunk(session, achievement_ids, low, high)
+
+        elapsed = time.perf_counter() - started
+        done = min(high, last_id) - first_id + 1
+        print(f"  users <= {min(high, last_id)}: {total} unlocks, {done / elapsed:,.0f} users/s")
+
+    verb = "would be unlocked" if dry_run else "unlocked"
+    print(f"{total} achievements {verb} in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Unlock achievements users already qualify for")
+    parser.add_argument(
+        "--achievement",
+        action="append",
+        default=[],
+        help="Achievement code to backfill (repeatable, default: all active)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=10000,
+        help="Users per transaction (default: 10000)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only count the missing unlocks"
+    )
+    args = parser.parse_args()
+
+    # Setup database connection
+    database_url = get_database_url()
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    try:
+        run(session, args.achievement, args.chunk_size, args.dry_run)
+    except Exception as e:
+        print(f"Error: {e}")
+        session.rollback()
+        sys.exit(1)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
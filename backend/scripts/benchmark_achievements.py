@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark building a user's achievements view (unlocked + locked lists).
+
+Compares the old path (the user, all achievements as ORM objects, the
+user's achievements, then ``ua.achievement`` per unlocked row) against
+AchievementService.get_user_achievements_view (one LEFT JOIN plus the
+in-memory catalog), on an in-memory SQLite database. Reports the number
+of SQL statements and the average time per request.
+
+In the old path ``ua.achievement`` mostly comes from the identity map,
+because every active achievement was just loaded in the same session;
+the cost is in the extra queries and in hydrating ORM objects for the
+whole catalog on every request.
+
+Usage:
+    # 500 achievements, half of them unlocked
+    python scripts/benchmark_achievements.py
+
+    # Bigger catalog, more samples
+    python scripts/benchmark_achievements.py --achievements 2000 --unlocked 0.9 --requests 500
+"""
+
+import os
+import sys
+import time
+import argparse
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base
+from app.models import User
+from app.models.achievement import Achievement, UserAchievement
+from app.services.achievement_service import AchievementService
+
+
+def old_view(db, discord_id: str):
+    """The view as the router built it before the change, with the same queries."""
+    user = db.query(User).filter(User.discord_id == discord_id).first()
+    all_achievements = db.query(Achievement).filter(
+        Achievement.is_active == True
+    ).order_by(Achievement.order_index).all()
+    user_achievements = db.query(UserAchievement).filter(
+        UserAchievement.user_id == user.id
+    ).all()
+
+    unlocked_ids = {ua.achievement_id for ua in user_achievements}
+    unlocked = [(ua.achievement, ua.unlocked_at) for ua in user_achievements]
+    locked = [a for a in all_achievements if a.id not in unlocked_ids]
+    return unlocked, locked
+
+
+def measure(label: str, view, db, discord_id: str, requests: int, statements: list):
+    # Fresh identity map per request, like a request-scoped session
+    db.expunge_all()
+    statements[0] = 0
+    unlocked, locked = view(db, discord_id)
+    per_request = statements[0]
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        db.expunge_all()
+        view(db, discord_id)
+    avg_ms = (time.perf_counter() - started) * 1000 / requests
+
+    print(f"{label:>8} {len(unlocked):>9} {len(locked):>7} {per_request:>11} {avg_ms:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the user achievements view")
+    parser.add_argument("--achievements", type=int, default=500, help="Active achievements")
+    parser.add_argument("--unlocked", type=float, default=0.5, help="Fraction unlocked by the user")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per variant")
+    args = parser.parse_args()
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    player = User(discord_id="benchmark", username="benchmark")
+    db.add(player)
+    db.add_all(
+        Achievement(
+            code=f"ACHIEVEMENT_{i}",
+            name=f"Achievement {i}",
+            description=f"Solve {i + 1} puzzles",
+            icon="🏆",
+            event_type="PUZZLE_SOLVED",
+            threshold=i + 1,
+            order_index=i,
+        )
+        for i in range(args.achievements)
+    )
+    db.commit()
+
+    unlocked_count = int(args.achievements * args.unlocked)
+    db.add_all(
+        UserAchievement(user_id=player.id, achievement_id=achievement_id)
+        for achievement_id in range(1, unlocked_count + 1)
+    )
+    db.commit()
+
+    statements = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statements(*_):
+        statements[0] += 1
+
+    # Warm the catalog once; it stays in memory between requests
+    AchievementService.get_all_achievements(db)
+
+    print(f"{'variant':>8} {'unlocked':>9} {'locked':>7} {'statements':>11} {'avg ms':>10}")
+    measure("old", old_view, db, player.discord_id, args.requests, statements)
+    measure("view", AchievementService.get_user_achievements_view, db,
+            player.discord_id, args.requests, statements)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-move cost of BotGameService.make_move over long games.
+
+Plays bot games up to a fixed number of plies against an in-memory SQLite
+database. The engine is replaced by a random-move stand-in, so the timings
+cover the move pipeline (validation, SAN, game-over checks, persistence)
+rather than Stockfish. Per-move cost should stay flat as games get longer.
+
+Usage:
+    # 20 games of up to 200 plies
+    python scripts/benchmark_bot_moves.py
+
+    # Longer games, more samples
+    python scripts/benchmark_bot_moves.py --games 50 --plies 300
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from collections import defaultdict
+
+import chess
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base
+from app.enums import BotDifficulty
+from app.models import User
+from app.schemas import BotGameCreate, BotMoveRequest
+from app.services.bot_game_service import BotGameService
+
+
+class RandomEngine:
+    """Stand-in for StockfishService that plays a random legal move."""
+
+    def get_best_move(self, fen: str, difficulty: BotDifficulty) -> str:
+        board = chess.Board(fen)
+        return random.choice(list(board.legal_moves)).uci()
+
+
+def play_game(service: BotGameService, player: User, plies: int, timings: dict):
+    """Play one game, recording make_move timings by ply."""
+    game = service.create_game(
+        player, BotGameCreate(difficulty=BotDifficulty.MEDIUM, player_color="white")
+    )
+    board = chess.Board()
+
+    while board.ply() < plies:
+        move = random.choice(list(board.legal_moves)).uci()
+
+        started = time.perf_counter()
+        response = service.make_move(game, player, BotMoveRequest(move=move))
+        timings[board.ply()].append(time.perf_counter() - started)
+
+        if response.game_over:
+            return
+        board = chess.Board(response.fen_after)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bot move pipeline")
+    parser.add_argument("--games", type=int, default=20, help="Number of games")
+    parser.add_argument("--plies", type=int, default=200, help="Plies per game")
+    parser.add_argument("--bucket", type=int, default=40, help="Plies per report row")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    player = User(discord_id="benchmark", username="benchmark")
+    db.add(player)
+    db.commit()
+
+    service = BotGameService(db)
+    service.stockfish = RandomEngine()
+
+    timings = defaultdict(list)
+    for _ in range(args.games):
+        play_game(service, player, args.plies, timings)
+
+    print(f"{'plies':>10} {'moves':>8} {'avg ms':>10}")
+    for start in range(0, args.plies, args.bucket):
+        samples = [
+            t for ply in range(start, start + args.bucket) for t in timings.get(ply, [])
+        ]
+        if samples:
+            avg_ms = sum(samples) * 1000 / len(samples)
+            print(f"{start:>4}-{start + args.bucket - 1:<5} {len(samples):>8} {avg_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
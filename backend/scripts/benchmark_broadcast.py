@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark WebSocket broadcast cost for a crowded game room.
+
+Fills a room with two players and a number of spectators, using stand-in
+sockets that only record the frames they get, and broadcasts move
+messages. Compares encoding the message once per connection (the old
+send_json loop) with the ConnectionManager, which encodes it once per
+room and sends the same text frame to every connection.
+
+Usage:
+    # 50 spectators, 2000 broadcasts
+    python scripts/benchmark_broadcast.py
+
+    # Bigger room
+    python scripts/benchmark_broadcast.py --spectators 500 --messages 500
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.connection_manager import ConnectionManager, orjson
+
+
+class RecordingSocket:
+    """Stand-in WebSocket that counts what it is sent."""
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.frames += 1
+        self.bytes += len(data)
+
+    async def send_json(self, data: dict):
+        # What Starlette does for every send_json call
+        await self.send_text(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def move_message(n: int) -> dict:
+    return {
+        "type": "move",
+        "move_uci": "e2e4",
+        "move_san": "e4",
+        "fen": "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1",
+        "white_time": 300 - n % 300,
+        "black_time": 300,
+        "is_white_turn": n % 2 == 1,
+    }
+
+
+async def bench_per_connection(sockets: list, messages: int) -> float:
+    """The old loop: send_json, and so json.dumps, for every connection."""
+    started = time.perf_counter()
+    for n in range(messages):
+        message = move_message(n)
+        for socket in sockets:
+            await socket.send_json(message)
+    return time.perf_counter() - started
+
+
+async def bench_manager(sockets: list, messages: int) -> float:
+    """ConnectionManager: one encode per broadcast, shared frame."""
+    manager = ConnectionManager(queue_size=messages + 1)
+    for i, socket in enumerate(sockets):
+        await manager.connect(socket, "bench", i)
+
+    started = time.perf_counter()
+    for n in range(messages):
+        await manager.broadcast_to_all("bench", move_message(n))
+
+    # Wait for the outboxes to drain
+    while any(socket.frames < messages for socket in sockets):
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+
+    await manager.close()
+    return elapsed
+
+
+async def run(spectators: int, messages: int):
+    connections = spectators + 2
+    print(f"Room: 2 players + {spectators} spectators, {messages} broadcasts")
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json'}")
+    print()
+
+    rows = [
+        ("send_json per connection", await bench_per_connection(
+            [RecordingSocket() for _ in range(connections)], messages
+        )),
+        ("encode once per room", await bench_manager(
+            [RecordingSocket() for _ in range(connections)], messages
+        )),
+    ]
+
+    print(f"{'':<28} {'total s':>10} {'us/broadcast':>14} {'us/frame':>10}")
+    for name, elapsed in rows:
+        per_broadcast = elapsed * 1e6 / messages
+        per_frame = per_broadcast / connections
+        print(f"{name:<28} {elapsed:>10.3f} {per_broadcast:>14.1f} {per_frame:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WebSocket broadcasts")
+    parser.add_argument("--spectators", type=int, default=50, help="Spectators in the room")
+    parser.add_argument("--messages", type=int, default=2000, help="Broadcasts to send")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.spectators, args.messages))
+
+
+if __name__ == "__main__":
+    main()
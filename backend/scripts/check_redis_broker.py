@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Check that RedisBroker connects WebSocket rooms across workers.
+
+Runs two ConnectionManagers, standing in for two workers, on one
+in-memory fakeredis server (no Redis needed) and checks that:
+
+- broadcasts reach connections on both workers
+- ``exclude`` skips only the sending connection
+- messages from the other worker reach its remote handlers
+- player and spectator counts add up across workers and drop on leave
+- a followed room reaches remote handlers without a connection, until
+  it is unfollowed
+
+Exits with status 1 if any check fails.
+
+Usage:
+    python scripts/check_redis_broker.py
+"""
+
+import os
+import sys
+import json
+import asyncio
+
+import fakeredis
+from fakeredis import aioredis
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.connection_manager import (
+    ConnectionManager,
+    RedisBroker,
+    PLAYER,
+    SPECTATOR,
+)
+
+
+class FakeWebSocket:
+    """Records the frames sent to it."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.received: list[dict] = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        self.received.append(json.loads(frame))
+
+    async def close(self, code: int = 1000):
+        pass
+
+    def types(self) -> list[str]:
+        return [message["type"] for message in self.received]
+
+
+failures = 0
+
+
+def check(name: str, actual, expected):
+    global failures
+    ok = actual == expected
+    if not ok:
+        failures += 1
+    print(f"{'ok  ' if ok else 'FAIL'} {name}: {actual!r}" + ("" if ok else f" (expected {expected!r})"))
+
+
+async def settle():
+    """Give the pub/sub readers and outboxes time to deliver."""
+    await asyncio.sleep(0.3)
+
+
+async def run():
+    server = fakeredis.FakeServer()
+    worker_a = ConnectionManager(RedisBroker(client=aioredis.FakeRedis(server=server)))
+    worker_b = ConnectionManager(RedisBroker(client=aioredis.FakeRedis(server=server)))
+
+    remote_b = []
+    worker_b.add_remote_handler(lambda code, message: remote_b.append((code, message["type"])))
+
+    white = FakeWebSocket("white")
+    black = FakeWebSocket("black")
+    spectator = FakeWebSocket("spectator")
+    other_room = FakeWebSocket("other room")
+
+    await worker_a.connect(white, "game", 1)
+    await worker_b.connect(black, "game", 2)
+    await worker_b.connect(spectator, "game", None, role=SPECTATOR)
+    await worker_a.connect(other_room, "other", 3)
+
+    check("players across workers", await worker_a.get_room_size("game", PLAYER), 2)
+    check("spectators across workers", await worker_a.get_room_size("game", SPECTATOR), 1)
+    check("players on worker a only", worker_a.get_connection_count("game", PLAYER), 1)
+
+    await worker_a.broadcast_to_game("game", {"type": "player_joined"}, exclude=white)
+    await worker_b.broadcast_to_all("game", {"type": "move"})
+    await settle()
+
+    check("sender excluded", white.types(), ["move"])
+    check("opponent on other worker", black.types(), ["player_joined", "move"])
+    check("spectator on other worker", spectator.types(), ["player_joined", "move"])
+    check("other room untouched", other_room.types(), [])
+    check("remote handler on worker b", remote_b, [("game", "player_joined")])
+
+    await worker_b.disconnect(black)
+    await worker_b.disconnect(spectator)
+    check("players after leave", await worker_a.get_room_size("game", PLAYER), 1)
+    check("spectators after leave", await worker_a.get_room_size("game", SPECTATOR), 0)
+
+    await worker_a.broadcast_to_all("game", {"type": "game_over"})
+    await settle()
+    check("no delivery after leave", black.types(), ["player_joined", "move"])
+    check("delivery on worker a", white.types(), ["move", "game_over"])
+
+    remote_a = []
+    worker_a.add_remote_handler(lambda code, message: remote_a.append((code, message["type"])))
+    await worker_a.follow("followed")
+    await worker_b.broadcast_to_all("followed", {"type": "move"})
+    await settle()
+    check("followed room", remote_a, [("followed", "move")])
+    check("follow doesn't count as a player", await worker_a.get_room_size("followed"), 0)
+
+    await worker_a.unfollow_except(set())
+    await worker_b.broadcast_to_all("followed", {"type": "move"})
+    await settle()
+    check("unfollowed room", remote_a, [("followed", "move")])
+
+    await worker_a.close()
+    await worker_b.close()
+
+
+def main():
+    asyncio.run(run())
+    if failures:
+        print(f"{failures} check(s) failed")
+        sys.exit(1)
+    print("All checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Load test a game room with many spectators.
+
+Creates a guest game on a running server, connects both players and a
+crowd of spectators over WebSockets, and plays a short game. Reports how
+long snapshots took to arrive and how long each move took to reach every
+spectator.
+
+Usage:
+    # 300 spectators against a local server
+    python scripts/load_test_spectators.py
+
+    # Other server, bigger crowd
+    python scripts/load_test_spectators.py --url http://localhost:8000 --spectators 1000
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+import websockets
+
+# Scholar's mate, ends the game after 7 plies
+MOVES = ["e2e4", "e7e5", "f1c4", "b8c6", "d1h5", "g8f6", "h5f7"]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def report(name: str, samples_ms: list[float]):
+    if not samples_ms:
+        print(f"{name:<24} no samples")
+        return
+    print(
+        f"{name:<24} n={len(samples_ms):<6} "
+        f"p50={statistics.median(samples_ms):7.1f}ms "
+        f"p95={percentile(samples_ms, 0.95):7.1f}ms "
+        f"max={max(samples_ms):7.1f}ms"
+    )
+
+
+async def spectator(ws_url: str, moves_seen: dict, snapshot_ms: list, ready: asyncio.Event, total: int):
+    """Connect, wait for the snapshot, then record when each move arrives."""
+    started = time.perf_counter()
+    async with websockets.connect(f"{ws_url}?spectate=true", max_queue=None) as ws:
+        while True:
+            message = json.loads(await ws.recv())
+            if message["type"] == "snapshot":
+                snapshot_ms.append((time.perf_counter() - started) * 1000)
+                if len(snapshot_ms) == total:
+                    ready.set()
+            elif message["type"] == "move":
+                moves_seen.setdefault(message["ply"], []).append(time.perf_counter())
+            elif message["type"] == "game_over":
+                return
+
+
+async def drain(ws):
+    try:
+        async for _ in ws:
+            pass
+    except websockets.ConnectionClosed:
+        pass
+
+
+async def run(base_url: str, spectators: int, connect_batch: int):
+    ws_base = base_url.replace("http", "ws", 1)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        game = (await client.post("/games", json={"color": "white", "guest_name": "White"})).json()
+        code = game["code"]
+        response = await client.post(f"/games/{code}/join", json={"code": code, "guest_name": "Black"})
+        response.raise_for_status()
+
+    ws_url = f"{ws_base}/games/{code}/ws"
+    print(f"Game {code}: 2 players, {spectators} spectators")
+
+    players = {
+        color: await websockets.connect(f"{ws_url}?guest_name={color}&player_color={color}")
+        for color in ("white", "black")
+    }
+    # Players get the broadcasts too; keep reading so they don't back up
+    drains = [asyncio.create_task(drain(ws)) for ws in players.values()]
+
+    moves_seen: dict[int, list[float]] = {}
+    snapshot_ms: list[float] = []
+    ready = asyncio.Event()
+
+    # Connect spectators in batches so the server's accept backlog isn't the bottleneck
+    tasks = []
+    for start in range(0, spectators, connect_batch):
+        for _ in range(min(connect_batch, spectators - start)):
+            tasks.append(asyncio.create_task(
+                spectator(ws_url, moves_seen, snapshot_ms, ready, spectators)
+            ))
+        await asyncio.sleep(0.05)
+    await asyncio.wait_for(ready.wait(), timeout=60)
+
+    sent_at = {}
+    for ply, move in enumerate(MOVES, start=1):
+        player = players["white" if ply % 2 else "black"]
+        sent_at[ply] = time.perf_counter()
+        await player.send(json.dumps({"type": "move", "move": move, "time_spent": 1000}))
+        # Give the room time to receive it before the next move
+        while len(moves_seen.get(ply, [])) < spectators:
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=60)
+    for ws in players.values():
+        await ws.close()
+    await asyncio.gather(*drains)
+
+    delivery_ms = [
+        (received - sent_at[ply]) * 1000
+        for ply, times in moves_seen.items()
+        for received in times
+    ]
+    last_ms = [(max(times) - sent_at[ply]) * 1000 for ply, times in moves_seen.items()]
+
+    print()
+    report("snapshot on connect", snapshot_ms)
+    report("move delivery", delivery_ms)
+    report("move to last spectator", last_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test spectators on one game room")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--spectators", type=int, default=300, help="Number of spectators")
+    parser.add_argument("--connect-batch", type=int, default=50, help="Spectators connected at once")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args.url, args.spectators, args.connect_batch))
+    except httpx.ConnectError:
+        print(f"Could not reach {args.url} - is the server running?")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()